@@ -0,0 +1,35 @@
+"""Fail when the tests in a JUnit XML report take longer than a time budget.
+
+Usage::
+
+    pytest tests/test_probe_manager.py --junitxml=report.xml
+    python scripts/check_test_budget.py report.xml 3.0
+"""
+
+from __future__ import annotations
+
+import sys
+import xml.etree.ElementTree as ET
+
+
+def total_test_time(report_path: str) -> float:
+    """Sum the ``time`` attribute of every testcase in *report_path*."""
+    root = ET.parse(report_path).getroot()
+    return sum(float(case.get("time", 0.0)) for case in root.iter("testcase"))
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 2:
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    report_path, budget = argv[0], float(argv[1])
+    total = total_test_time(report_path)
+    print(f"Test time: {total:.2f}s (budget {budget:.2f}s)")
+    if total > budget:
+        print("Test time budget exceeded; check the --durations report for slow tests.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
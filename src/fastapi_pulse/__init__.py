@@ -13,6 +13,7 @@ __version__ = "0.2.0"
 import importlib.resources
 import logging
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Callable, List, Optional, Union
 
@@ -23,6 +24,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from .constants import (
     DEFAULT_PAYLOAD_CONFIG_FILENAME,
     PULSE_ENDPOINT_REGISTRY_KEY,
+    PULSE_INSTALLED_KEY,
     PULSE_PAYLOAD_STORE_KEY,
     PULSE_PROBE_MANAGER_KEY,
     PULSE_STATE_KEY,
@@ -57,6 +59,9 @@ def add_pulse(
         cors_allowed_origins: List of allowed origins for CORS. If None, reads from
             PULSE_ALLOWED_ORIGINS environment variable (comma-separated).
             Defaults to ["http://localhost:3000"] for safety.
+
+    Calling ``add_pulse`` again on the same app only swaps in the new metrics
+    collector; middleware, routes and the dashboard mount are left in place.
     """
     if metrics is not None and metrics_factory is not None:
         raise ValueError("Provide either 'metrics' or 'metrics_factory', not both.")
@@ -67,6 +72,10 @@ def add_pulse(
     if metrics_instance is None:
         metrics_instance = PulseMetrics()
 
+    if getattr(app.state, PULSE_INSTALLED_KEY, False):
+        _replace_metrics(app, metrics_instance)
+        return
+
     # 1. Add CORS middleware if enabled (for dashboard functionality)
     if enable_cors:
         # Determine allowed origins with security-first defaults
@@ -134,30 +143,53 @@ def add_pulse(
 
     # 6. Mount the static dashboard, finding its path within the package
     try:
-        # This is the robust way to find package data files
-        try:
-            static_path = importlib.resources.files(__name__) / "static"  # type: ignore[attr-defined]
-            static_path_str = str(static_path)
-        except AttributeError:
-            with importlib.resources.path(__name__, "static") as data_path:
-                static_path_str = str(data_path)
-
-        # Mount static files directory
         app.mount(
             dashboard_path,
-            StaticFiles(directory=static_path_str, html=True),
+            StaticFiles(directory=_get_static_dir(), html=True),
             name="pulse_dashboard"
         )
         logger.info("Pulse dashboard mounted at %s", dashboard_path)
     except Exception as e:
         logger.warning("Could not mount pulse dashboard: %s", e)
 
+    setattr(app.state, PULSE_INSTALLED_KEY, True)
+
+
+@lru_cache(maxsize=None)
+def _get_static_dir() -> str:
+    """Resolve the packaged dashboard directory once per process."""
+    try:
+        return str(importlib.resources.files(__name__) / "static")  # type: ignore[attr-defined]
+    except AttributeError:
+        # Python 3.8 has no importlib.resources.files()
+        with importlib.resources.path(__name__, "static") as data_path:
+            return str(data_path)
+
+
+def _replace_metrics(app: FastAPI, metrics: PulseMetrics) -> None:
+    """Point an existing Pulse installation at a new metrics collector."""
+    setattr(app.state, PULSE_STATE_KEY, metrics)
+
+    probe_manager = getattr(app.state, PULSE_PROBE_MANAGER_KEY, None)
+    if probe_manager is not None:
+        probe_manager.metrics = metrics
+
+    for middleware in app.user_middleware:
+        if middleware.cls is PulseMiddleware:
+            middleware.kwargs["metrics"] = metrics
+
+    # A running app holds middleware instances built from the old kwargs;
+    # drop the stack so the next request rebuilds it once.
+    if app.middleware_stack is not None:
+        app.middleware_stack = None
+
 # Expose a clean public API for the package
 __all__ = [
     "add_pulse",
     "PulseMetrics",
     "PULSE_STATE_KEY",
     "PULSE_ENDPOINT_REGISTRY_KEY",
+    "PULSE_INSTALLED_KEY",
     "PULSE_PAYLOAD_STORE_KEY",
     "PULSE_PROBE_MANAGER_KEY",
 ]
@@ -4,6 +4,7 @@ PULSE_STATE_KEY = "fastapi_pulse_metrics"
 PULSE_ENDPOINT_REGISTRY_KEY = "fastapi_pulse_endpoint_registry"
 PULSE_PROBE_MANAGER_KEY = "fastapi_pulse_probe_manager"
 PULSE_PAYLOAD_STORE_KEY = "fastapi_pulse_payload_store"
+PULSE_INSTALLED_KEY = "fastapi_pulse_installed"
 
 DEFAULT_PAYLOAD_CONFIG_FILENAME = "pulse_probes.json"
 
@@ -13,5 +14,6 @@ __all__ = [
     "PULSE_ENDPOINT_REGISTRY_KEY",
     "PULSE_PROBE_MANAGER_KEY",
     "PULSE_PAYLOAD_STORE_KEY",
+    "PULSE_INSTALLED_KEY",
     "DEFAULT_PAYLOAD_CONFIG_FILENAME",
 ]
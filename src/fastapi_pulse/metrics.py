@@ -2,122 +2,440 @@
 
 from __future__ import annotations
 
+import heapq
 import threading
 import time
 import math
+from array import array
+from bisect import insort
 from collections import defaultdict, deque
-from dataclasses import dataclass
-from typing import Dict, Any, Deque, Optional
-
-from tdigest import TDigest
-
-
-@dataclass
-class _DigestBucket:
-    """Container for digest data within a fixed time bucket."""
+from typing import Callable, Dict, Any, Deque, Iterable, List, Optional, Sequence, Tuple
+
+from .serialization import dumps
+
+DEFAULT_QUANTILES = (50, 95, 99)
+
+# Status class slot (0-5) for every code below 1000; 6xx and above fold into 5.
+_STATUS_CLASS = bytes(min(code // 100, 5) for code in range(1000))
+
+
+# Log-spaced histogram bins with ~1% relative error; unlike P-Square markers,
+# bin counts from different buckets can simply be added together.
+_HIST_ALPHA = 0.01
+_HIST_GAMMA = (1 + _HIST_ALPHA) / (1 - _HIST_ALPHA)
+_HIST_LOG_GAMMA = math.log(_HIST_GAMMA)
+_HIST_MIN_VALUE = 1e-6
+_HIST_ZERO_BIN = -(1 << 31)
+
+
+def _hist_bin(value: float) -> int:
+    """Histogram bin holding *value*; bin ``k`` covers ``(gamma**(k-1), gamma**k]``."""
+    if value <= _HIST_MIN_VALUE:
+        return _HIST_ZERO_BIN
+    return math.ceil(math.log(value) / _HIST_LOG_GAMMA)
+
+
+def _hist_value(index: int) -> float:
+    """Representative value of a bin, within ``_HIST_ALPHA`` of anything in it."""
+    if index == _HIST_ZERO_BIN:
+        return 0.0
+    return 2 * _HIST_GAMMA ** index / (_HIST_GAMMA + 1)
+
+
+def _interpolate(sorted_values: Sequence[float], fraction: float) -> float:
+    """Linearly interpolated quantile of sorted values, like ``numpy.percentile``."""
+    rank = fraction * (len(sorted_values) - 1)
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def _histogram_quantile(bins: Dict[int, int], total_count: int, fraction: float) -> float:
+    """Interpolated quantile of histogram *bins*, mirroring ``_interpolate``."""
+    rank = fraction * (total_count - 1)
+    lower = math.floor(rank)
+    upper = min(lower + 1, total_count - 1)
+    low_value = high_value = None
+    seen = 0
+    for index in sorted(bins):
+        seen += bins[index]
+        if low_value is None and seen > lower:
+            low_value = _hist_value(index)
+        if seen > upper:
+            high_value = _hist_value(index)
+            break
+    return low_value + (high_value - low_value) * (rank - lower)
+
+
+class PSquareEstimator:
+    """Streaming quantile estimator using the P-Square algorithm.
+
+    Keeps five markers per quantile and updates them in O(1) per sample,
+    so queries never sort. Up to ``exact_limit`` samples are kept verbatim
+    and answered exactly (linear interpolation, like ``numpy.percentile``);
+    past that point the markers are seeded from those samples.
+    """
+
+    __slots__ = ("quantile", "count", "_heights", "_positions", "_desired", "_increments")
+
+    exact_limit = 32
+
+    def __init__(self, quantile: float) -> None:
+        self.quantile = quantile / 100.0
+        self.count = 0
+        self._heights: List[float] = []
+        self._positions: List[float] = []
+        self._desired: List[float] = []
+        self._increments: List[float] = []
+
+    @classmethod
+    def from_sorted(cls, quantile: float, samples: Sequence[float]) -> "PSquareEstimator":
+        """Build an estimator that has already seen the sorted *samples*."""
+        estimator = cls(quantile)
+        estimator.reset(samples)
+        return estimator
+
+    def reset(self, samples: Sequence[float] = ()) -> None:
+        """Forget all state, optionally restarting from sorted *samples*."""
+        if len(samples) > self.exact_limit:
+            raise ValueError(f"At most {self.exact_limit} samples can seed an estimator")
+        self.count = len(samples)
+        self._heights = list(samples)
+
+    def observe(self, value: float) -> None:
+        """Feed a single sample into the estimator."""
+        self.count += 1
+        heights = self._heights
+        if self.count <= self.exact_limit:
+            insort(heights, value)
+            return
+        if self.count == self.exact_limit + 1:
+            self._seed_markers()
+            heights = self._heights
+
+        positions = self._positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        desired = self._desired
+        increments = self._increments
+        for i in range(5):
+            desired[i] += increments[i]
+
+        for i in (1, 2, 3):
+            delta = desired[i] - positions[i]
+            if (delta >= 1 and positions[i + 1] - positions[i] > 1) or (
+                delta <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if delta > 0 else -1
+                candidate = self._parabolic(i, step)
+                if heights[i - 1] < candidate < heights[i + 1]:
+                    heights[i] = candidate
+                else:
+                    heights[i] = self._linear(i, step)
+                positions[i] += step
+
+    def value(self) -> Optional[float]:
+        """Return the current quantile estimate, or None without samples."""
+        if self.count == 0:
+            return None
+        if self.count <= self.exact_limit:
+            return _interpolate(self._heights, self.quantile)
+        return self._heights[2]
+
+    def _seed_markers(self) -> None:
+        """Collapse the exact sample buffer into the five P-Square markers."""
+        samples = self._heights
+        n = len(samples)
+        p = self.quantile
+        desired = [
+            1.0,
+            1.0 + (n - 1) * p / 2,
+            1.0 + (n - 1) * p,
+            1.0 + (n - 1) * (1.0 + p) / 2,
+            float(n),
+        ]
+        middle = min(max(round(desired[2]), 3), n - 2)
+        lower = min(max(round(desired[1]), 2), middle - 1)
+        upper = max(min(round(desired[3]), n - 1), middle + 1)
+        positions = [1, lower, middle, upper, n]
+        self._heights = [samples[pos - 1] for pos in positions]
+        self._positions = [float(pos) for pos in positions]
+        self._desired = desired
+        self._increments = [0.0, p / 2, p, (1.0 + p) / 2, 1.0]
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
 
-    start: float
-    digest: TDigest
-    count: int = 0
-    total: float = 0.0
+    def _linear(self, i: int, step: int) -> float:
+        q = self._heights
+        n = self._positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
 
 
 class RollingWindowDigest:
-    """Maintain TDigest statistics over a sliding time window."""
+    """Maintain streaming quantile estimates over a sliding time window.
+
+    Buckets live in a fixed ring of parallel per-slot columns (start, count,
+    total, samples, estimators) sized to cover the window. Counts and totals
+    are typed arrays, so aggregate reads are ``sum()`` over contiguous unboxed
+    values and bucket rollover reuses a slot in place.
+
+    A bucket keeps its first ``PSquareEstimator.exact_limit`` samples in one
+    shared sorted buffer for all quantiles. Once it overflows it switches to
+    per-quantile P-Square estimators plus a log-spaced histogram, both seeded
+    from that buffer. Each slot's buffer, estimators and histogram are
+    allocated on first use and reset in place when the slot is recycled, so
+    steady-state rollover allocates nothing.
+
+    P-Square estimates cannot be combined across buckets, so they only answer
+    queries while a single bucket holds data. Window-wide percentiles merge
+    the sorted buffers exactly while no bucket has overflowed, and otherwise
+    merge the histograms.
+    """
+
+    __slots__ = (
+        "window_seconds",
+        "bucket_seconds",
+        "quantiles",
+        "_now",
+        "_starts",
+        "_counts",
+        "_totals",
+        "_samples",
+        "_estimators",
+        "_histograms",
+        "_oldest_start",
+    )
 
     def __init__(
         self,
         window_seconds: int = 300,
         bucket_seconds: int = 60,
-        delta: float = 0.01,
-        K: int = 25,
+        quantiles: Iterable[float] = DEFAULT_QUANTILES,
+        time_fn: Callable[[], float] = time.monotonic,
     ) -> None:
         self.window_seconds = window_seconds
+        self._now = time_fn
         self.bucket_seconds = max(1, bucket_seconds)
-        self.delta = delta
-        self.K = K
-        self._buckets: Deque[_DigestBucket] = deque()
+        self.quantiles = tuple(quantiles)
+        slots = int(self.window_seconds // self.bucket_seconds) + 1
+        self._starts: List[Optional[float]] = [None] * slots
+        self._counts = array("q", bytes(8 * slots))
+        self._totals = array("d", bytes(8 * slots))
+        self._samples: List[Optional[array]] = [None] * slots
+        # Once allocated, a slot's estimators are live only while its count
+        # exceeds PSquareEstimator.exact_limit.
+        self._estimators: List[Optional[Dict[float, PSquareEstimator]]] = [None] * slots
+        # Bin index -> count, live under the same condition as the estimators.
+        self._histograms: List[Optional[Dict[int, int]]] = [None] * slots
+        # Start of the oldest live bucket, so _trim can return early in O(1).
+        self._oldest_start: Optional[float] = None
 
     def add(self, value: float, timestamp: Optional[float] = None) -> None:
         """Add a latency sample into the rolling window."""
-        now = time.time() if timestamp is None else timestamp
+        now = self._now() if timestamp is None else timestamp
         self._trim(now)
 
-        bucket_start = math.floor(now / self.bucket_seconds) * self.bucket_seconds
-
-        if self._buckets and self._buckets[-1].start == bucket_start:
-            bucket = self._buckets[-1]
+        index = math.floor(now / self.bucket_seconds)
+        slot = index % len(self._starts)
+        bucket_start = index * self.bucket_seconds
+
+        current_start = self._starts[slot]
+        if current_start != bucket_start:
+            if current_start is not None and current_start > bucket_start:
+                # The slot already holds a newer bucket; this sample fell
+                # out of the window before it arrived.
+                return
+            self._starts[slot] = bucket_start
+            self._counts[slot] = 0
+            self._totals[slot] = 0.0
+            self._clear_samples(slot)
+            if self._oldest_start is None or bucket_start < self._oldest_start:
+                self._oldest_start = bucket_start
+
+        count = self._counts[slot]
+        limit = PSquareEstimator.exact_limit
+        if count < limit:
+            samples = self._samples[slot]
+            if samples is None:
+                samples = self._samples[slot] = array("d")
+            insort(samples, value)
         else:
-            bucket = _DigestBucket(
-                start=bucket_start,
-                digest=TDigest(delta=self.delta, K=self.K),
-            )
-            self._buckets.append(bucket)
-
-        bucket.digest.update(value)
-        bucket.count += 1
-        bucket.total += value
+            estimators = self._estimators[slot]
+            histogram = self._histograms[slot]
+            if count == limit:
+                samples = self._samples[slot]
+                if estimators is None:
+                    estimators = self._estimators[slot] = {
+                        q: PSquareEstimator.from_sorted(q, samples) for q in self.quantiles
+                    }
+                    histogram = self._histograms[slot] = {}
+                else:
+                    for estimator in estimators.values():
+                        estimator.reset(samples)
+                    histogram.clear()
+                for sample in samples:
+                    index = _hist_bin(sample)
+                    histogram[index] = histogram.get(index, 0) + 1
+                del samples[:]
+            for estimator in estimators.values():
+                estimator.observe(value)
+            index = _hist_bin(value)
+            histogram[index] = histogram.get(index, 0) + 1
+        self._counts[slot] += 1
+        self._totals[slot] += value
 
     def count(self) -> int:
         self._refresh()
-        return sum(bucket.count for bucket in self._buckets)
+        return sum(self._counts)
 
     def total(self) -> float:
         self._refresh()
-        return sum(bucket.total for bucket in self._buckets)
+        return sum(self._totals)
 
     def mean(self) -> float:
         self._refresh()
-        total = 0.0
-        count = 0
-        for bucket in self._buckets:
-            total += bucket.total
-            count += bucket.count
+        count = sum(self._counts)
         if count == 0:
             return 0.0
-        return total / count
+        return sum(self._totals) / count
 
     def percentile(self, percentile: float) -> Optional[float]:
-        """Return the requested percentile (0-100) if enough data exists."""
-        self._refresh()
-        merged = TDigest(delta=self.delta, K=self.K)
-        total_count = 0
-        for bucket in self._buckets:
-            merged = merged + bucket.digest
-            total_count += bucket.count
+        """Return the requested percentile (0-100) if enough data exists.
 
+        Any percentile can be requested; only those in ``quantiles`` get a
+        P-Square estimate, the rest are read from the histograms.
+        """
+        self._refresh()
+        fraction = percentile / 100.0
+        limit = PSquareEstimator.exact_limit
+        live = [slot for slot, count in enumerate(self._counts) if count]
+        total_count = sum(self._counts[slot] for slot in live)
         if total_count < 2:
             return None
 
-        if merged.n < 2:
-            return None
-
-        merged.compress()
-        return float(merged.percentile(percentile))
+        overflowed = [slot for slot in live if self._counts[slot] > limit]
+        if not overflowed:
+            merged = list(heapq.merge(*(self._samples[slot] for slot in live)))
+            return _interpolate(merged, fraction)
+        if len(live) == 1 and percentile in self.quantiles:
+            return self._estimators[live[0]][percentile].value()
+
+        bins: Dict[int, int] = {}
+        for slot in live:
+            if self._counts[slot] > limit:
+                for index, count in self._histograms[slot].items():
+                    bins[index] = bins.get(index, 0) + count
+            else:
+                for sample in self._samples[slot]:
+                    index = _hist_bin(sample)
+                    bins[index] = bins.get(index, 0) + 1
+        return _histogram_quantile(bins, total_count, fraction)
 
     def _trim(self, now: float) -> None:
         cutoff = now - self.window_seconds
-        while self._buckets and self._buckets[0].start < cutoff:
-            self._buckets.popleft()
+        oldest = self._oldest_start
+        if oldest is None or oldest >= cutoff:
+            return
+
+        # Something expired: clear those slots and find the new oldest bucket.
+        remaining: Optional[float] = None
+        starts = self._starts
+        for slot, start in enumerate(starts):
+            if start is None:
+                continue
+            if start < cutoff:
+                starts[slot] = None
+                self._counts[slot] = 0
+                self._totals[slot] = 0.0
+                self._clear_samples(slot)
+            elif remaining is None or start < remaining:
+                remaining = start
+        self._oldest_start = remaining
+
+    def _clear_samples(self, slot: int) -> None:
+        samples = self._samples[slot]
+        if samples is not None:
+            del samples[:]
 
     def _refresh(self) -> None:
-        self._trim(time.time())
+        self._trim(self._now())
 
 
 class PulseMetrics:
     """Thread-safe performance metrics collector with bounded memory."""
 
+    __slots__ = (
+        "max_samples",
+        "window_seconds",
+        "bucket_seconds",
+        "max_endpoints",
+        "ingest_batch_size",
+        "ingest_max_delay",
+        "snapshot_ttl",
+        "_request_counts",
+        "_status_codes",
+        "_endpoint_metrics",
+        "_lock",
+        "_now",
+        "_pending",
+        "_drained_at",
+        "_seq",
+        "_snapshot",
+        "_snapshot_seq",
+        "_snapshot_at",
+        "_encoded",
+        "_latency_trackers",
+        "_global_latency",
+        "_status_classes",
+        "_endpoint_access_times",
+    )
+
     def __init__(
         self,
         max_samples: int = 1000,
         window_seconds: int = 300,
         bucket_seconds: int = 60,
         max_endpoints: int = 1000,
+        ingest_batch_size: int = 256,
+        ingest_max_delay: float = 1.0,
+        time_fn: Callable[[], float] = time.monotonic,
     ):
         # max_samples is kept for backwards compatibility but superseded by the
         # rolling window configuration.
         self.max_samples = max_samples
         self._lock = threading.Lock()
+        self._now = time_fn
+
+        # Lock-free ingest buffer; deque appends are atomic under the GIL.
+        self.ingest_batch_size = ingest_batch_size
+        self.ingest_max_delay = ingest_max_delay
+        self._pending: Deque[Tuple[str, int, float, float]] = deque()
+        self._drained_at = time_fn()
+
+        # Cached get_metrics() snapshot, invalidated by new requests
+        self._seq = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_seq = -1
+        self._snapshot_at = 0.0
+        self._encoded: Optional[Tuple[Dict[str, Any], bytes]] = None
+        self.snapshot_ttl = min(1.0, bucket_seconds / 2)
 
         self.window_seconds = window_seconds
         self.bucket_seconds = bucket_seconds
@@ -127,23 +445,26 @@ class PulseMetrics:
             lambda: RollingWindowDigest(
                 window_seconds=self.window_seconds,
                 bucket_seconds=self.bucket_seconds,
+                time_fn=time_fn,
             )
         )
         self._global_latency = RollingWindowDigest(
             window_seconds=self.window_seconds,
             bucket_seconds=self.bucket_seconds,
+            time_fn=time_fn,
         )
 
         # Metrics storage
-        self.request_counts = defaultdict(int)
-        self.error_counts = defaultdict(int)
-        self.status_codes = defaultdict(lambda: defaultdict(int))
+        self._request_counts = defaultdict(int)
+        self._status_codes = defaultdict(lambda: defaultdict(int))
+        # Per-endpoint counts by status class (1xx..5xx, 6xx+ folded into 5xx)
+        self._status_classes: Dict[str, List[int]] = defaultdict(lambda: [0] * 6)
 
         # LRU tracking for eviction
         self._endpoint_access_times: Dict[str, float] = {}
 
         # Business metrics
-        self.endpoint_metrics = defaultdict(
+        self._endpoint_metrics = defaultdict(
             lambda: {
                 "total_requests": 0,
                 "success_count": 0,
@@ -160,55 +481,98 @@ class PulseMetrics:
                       status_code: int,
                       duration_ms: float,
                       correlation_id: str = None):
-        """Record a request's performance metrics."""
-        with self._lock:
-            key = f"{method} {endpoint}"
-
-            # Enforce max endpoints with LRU eviction
-            if key not in self.request_counts:
-                if len(self.request_counts) >= self.max_endpoints:
-                    # Evict least recently used endpoint
-                    oldest_key = min(
-                        self._endpoint_access_times.items(),
-                        key=lambda x: x[1]
-                    )[0]
-                    self._evict_endpoint(oldest_key)
-
-            # Update access time for LRU
-            self._endpoint_access_times[key] = time.time()
-
-            # Basic counters
-            self.request_counts[key] += 1
-            self.status_codes[key][status_code] += 1
-
-            # Latency tracking
-            tracker = self._latency_trackers[key]
-            tracker.add(duration_ms)
-            self._global_latency.add(duration_ms)
-
-            # Error tracking
-            if status_code >= 400:
-                self.error_counts[key] += 1
-
-            # Update endpoint metrics
-            metrics = self.endpoint_metrics[key]
-            metrics["total_requests"] += 1
-
-            if status_code < 400:
-                metrics["success_count"] += 1
-            else:
-                metrics["error_count"] += 1
+        """Record a request's performance metrics.
+
+        The sample is appended to an ingest buffer without taking the lock;
+        buffered samples are applied in batches on read, once the buffer
+        reaches ``ingest_batch_size``, or once ``ingest_max_delay`` seconds
+        have passed since the last batch. A batch also refreshes the latency
+        stats of the endpoints it touched, which ``peek_p95_response_time``
+        reads.
+        """
+        now = self._now()
+        pending = self._pending
+        pending.append((f"{method} {endpoint}", status_code, duration_ms, now))
+        self._seq += 1
+        if (
+            len(pending) >= self.ingest_batch_size
+            or now - self._drained_at >= self.ingest_max_delay
+        ):
+            with self._lock:
+                self._drained_at = now
+                for key in self._drain_pending():
+                    metrics = self._endpoint_metrics.get(key)
+                    if metrics is not None:
+                        self._refresh_latency_stats(key, metrics)
+
+    def _drain_pending(self) -> set:
+        """Apply buffered samples to the aggregates (called with lock held).
+
+        Returns the keys that received samples.
+        """
+        pending = self._pending
+        touched = set()
+        while True:
+            try:
+                key, status_code, duration_ms, timestamp = pending.popleft()
+            except IndexError:
+                return touched
+            self._apply(key, status_code, duration_ms, timestamp)
+            touched.add(key)
+
+    def _apply(self, key: str, status_code: int, duration_ms: float, timestamp: float) -> None:
+        """Fold a single sample into the aggregates (called with lock held)."""
+        # Enforce max endpoints with LRU eviction
+        if key not in self._request_counts:
+            if len(self._request_counts) >= self.max_endpoints:
+                # Evict least recently used endpoint
+                oldest_key = min(
+                    self._endpoint_access_times.items(),
+                    key=lambda x: x[1]
+                )[0]
+                self._evict_endpoint(oldest_key)
+
+        # Update access time for LRU
+        self._endpoint_access_times[key] = timestamp
+
+        # Basic counters
+        self._request_counts[key] += 1
+        status_class = _STATUS_CLASS[status_code] if 0 <= status_code < 1000 else 5
+        self._status_codes[key][status_code] += 1
+        self._status_classes[key][status_class] += 1
+
+        # Latency tracking
+        self._latency_trackers[key].add(duration_ms, timestamp)
+        self._global_latency.add(duration_ms, timestamp)
+
+        # Update endpoint metrics
+        metrics = self._endpoint_metrics[key]
+        metrics["total_requests"] += 1
+
+        if status_class < 4:
+            metrics["success_count"] += 1
+        else:
+            metrics["error_count"] += 1
+
+    def _refresh_latency_stats(self, key: str, metrics: Dict[str, Any]) -> None:
+        """Fill derived latency stats for an endpoint (called with lock held).
+
+        Stats are derived when metrics are read rather than on every
+        recorded request; values from an expired window are retained.
+        """
+        tracker = self._latency_trackers.get(key)
+        if tracker is None or tracker.count() == 0:
+            return
 
-            # Calculate stats
-            metrics["avg_response_time"] = tracker.mean()
+        metrics["avg_response_time"] = tracker.mean()
 
-            p95 = tracker.percentile(95)
-            p99 = tracker.percentile(99)
+        p95 = tracker.percentile(95)
+        p99 = tracker.percentile(99)
 
-            if p95 is not None:
-                metrics["p95_response_time"] = p95
-            if p99 is not None:
-                metrics["p99_response_time"] = p99
+        if p95 is not None:
+            metrics["p95_response_time"] = p95
+        if p99 is not None:
+            metrics["p99_response_time"] = p99
 
     def _evict_endpoint(self, key: str) -> None:
         """Evict an endpoint from all metrics storage (called with lock held)."""
@@ -216,10 +580,10 @@ class PulseMetrics:
         logger = logging.getLogger(__name__)
 
         # Remove from all storage structures
-        self.request_counts.pop(key, None)
-        self.error_counts.pop(key, None)
-        self.status_codes.pop(key, None)
-        self.endpoint_metrics.pop(key, None)
+        self._request_counts.pop(key, None)
+        self._status_codes.pop(key, None)
+        self._status_classes.pop(key, None)
+        self._endpoint_metrics.pop(key, None)
         self._latency_trackers.pop(key, None)
         self._endpoint_access_times.pop(key, None)
 
@@ -229,23 +593,114 @@ class PulseMetrics:
         )
 
     def get_metrics(self) -> Dict[str, Any]:
-        """Get current performance metrics."""
+        """Get current performance metrics.
+
+        The snapshot is reused for up to ``snapshot_ttl`` seconds as long as no
+        request has been recorded since it was built.
+        """
+        now = self._now()
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and self._snapshot_seq == self._seq
+            and now - self._snapshot_at < self.snapshot_ttl
+        ):
+            return snapshot
+
         with self._lock:
-            return {
-                "request_counts": dict(self.request_counts),
-                "error_counts": dict(self.error_counts),
-                "endpoint_metrics": dict(self.endpoint_metrics),
+            seq = self._seq
+            self._drain_pending()
+            for key, metrics in self._endpoint_metrics.items():
+                self._refresh_latency_stats(key, metrics)
+            snapshot = {
+                "request_counts": dict(self._request_counts),
+                "error_counts": self._error_counts(),
+                "endpoint_metrics": {
+                    key: dict(metrics) for key, metrics in self._endpoint_metrics.items()
+                },
                 "status_codes": {
                     endpoint: dict(status_counts)
-                    for endpoint, status_counts in self.status_codes.items()
+                    for endpoint, status_counts in self._status_codes.items()
                 },
                 "summary": self._calculate_summary()
             }
+            self._snapshot = snapshot
+            self._snapshot_seq = seq
+            self._snapshot_at = now
+            return snapshot
+
+    def get_metrics_bytes(self, snapshot: Optional[Dict[str, Any]] = None) -> bytes:
+        """Return *snapshot* (default: the current metrics) encoded as JSON.
+
+        The encoding is reused for as long as the same cached snapshot is served.
+        """
+        if snapshot is None:
+            snapshot = self.get_metrics()
+        encoded = self._encoded
+        if encoded is not None and encoded[0] is snapshot:
+            return encoded[1]
+        payload = dumps(snapshot)
+        self._encoded = (snapshot, payload)
+        return payload
+
+    @property
+    def request_counts(self) -> Dict[str, int]:
+        """Per-endpoint request totals, including still-buffered requests."""
+        with self._lock:
+            self._drain_pending()
+            return self._request_counts
+
+    @property
+    def status_codes(self) -> Dict[str, Dict[int, int]]:
+        """Per-endpoint counts by status code, including still-buffered requests."""
+        with self._lock:
+            self._drain_pending()
+            return self._status_codes
+
+    @property
+    def endpoint_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint business metrics, drained and with fresh latency stats."""
+        with self._lock:
+            self._drain_pending()
+            for key, metrics in self._endpoint_metrics.items():
+                self._refresh_latency_stats(key, metrics)
+            return self._endpoint_metrics
+
+    @property
+    def error_counts(self) -> Dict[str, int]:
+        """Per-endpoint 4xx/5xx counts, derived from the status class table.
+
+        Like the other counters it is a ``defaultdict(int)``, so endpoints
+        without errors read as 0.
+        """
+        with self._lock:
+            self._drain_pending()
+            return defaultdict(int, self._error_counts())
+
+    def _error_counts(self) -> Dict[str, int]:
+        """Build per-endpoint error counts (called with lock held)."""
+        return {
+            key: classes[4] + classes[5]
+            for key, classes in self._status_classes.items()
+            if classes[4] or classes[5]
+        }
+
+    def peek_p95_response_time(self, key: str) -> Optional[float]:
+        """Return the endpoint's p95 as of the last batch or read, without locking.
+
+        Meant for per-request checks: it never drains the ingest buffer, so the
+        value can lag by up to ``ingest_batch_size`` requests or
+        ``ingest_max_delay`` seconds.
+        """
+        metrics = self._endpoint_metrics.get(key)
+        if metrics is None:
+            return None
+        return metrics["p95_response_time"]
 
     def _calculate_summary(self) -> Dict[str, Any]:
         """Calculate summary metrics across all endpoints."""
-        total_requests = sum(self.request_counts.values())
-        total_errors = sum(self.error_counts.values())
+        total_requests = sum(self._request_counts.values())
+        total_errors = sum(classes[4] + classes[5] for classes in self._status_classes.values())
 
         window_request_count = self._global_latency.count()
         avg_latency = self._global_latency.mean()
@@ -5,9 +5,9 @@ from __future__ import annotations
 import time
 import logging
 import re
-from typing import Callable, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, Tuple
 
-from starlette.datastructures import Headers, MutableHeaders
 from starlette.types import Message, Receive, Scope, Send
 
 from .metrics import PulseMetrics
@@ -17,6 +17,80 @@ logger = logging.getLogger(__name__)
 SLOW_REQUEST_THRESHOLD_MS = 1000
 SLA_LATENCY_THRESHOLD_MS = 200
 DEFAULT_ERROR_BODY = b'{"detail":"Internal Server Error"}'
+RESPONSE_TIME_HEADER = b"x-response-time-ms"
+_FALLBACK_HEADERS = (
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(DEFAULT_ERROR_BODY)).encode("latin-1")),
+)
+
+# UUID or all-digit path segment starts, replaced in a single pass.
+_ID_SEGMENT_RE = re.compile(
+    r'/(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)',
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_path(path: str) -> str:
+    """Collapse numeric and UUID path segments to ``{id}``."""
+    return _ID_SEGMENT_RE.sub('/{id}', path)
+
+
+def _get_header(headers: Iterable[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    """Return the first raw value for lower-case header *name*, if present."""
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+class _ResponseTracker:
+    """Per-request ``send`` wrapper recording status and latency.
+
+    A slotted object instead of a closure over ``nonlocal`` cells keeps the
+    per-request state in one small allocation.
+    """
+
+    __slots__ = ("send", "start_ns", "status_code", "duration_ms", "response_started")
+
+    def __init__(self, send: Send, start_ns: int) -> None:
+        self.send = send
+        self.start_ns = start_ns
+        self.status_code = 500
+        self.duration_ms: Optional[float] = None
+        self.response_started = False
+
+    def duration(self) -> float:
+        """Return the latency in milliseconds, measured on first call."""
+        duration_ms = self.duration_ms
+        if duration_ms is None:
+            duration_ms = self.duration_ms = (time.perf_counter_ns() - self.start_ns) / 1_000_000
+        return duration_ms
+
+    async def __call__(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self.response_started = True
+            self.status_code = message["status"]
+
+            # Attach latency information, editing the header list in place.
+            raw_headers = message.get("headers")
+            if raw_headers is None:
+                raw_headers = message["headers"] = []
+            elif not isinstance(raw_headers, list):
+                raw_headers = message["headers"] = list(raw_headers)
+            header_value = b"%.2f" % self.duration()
+            for index, (name, _) in enumerate(raw_headers):
+                if name == RESPONSE_TIME_HEADER:
+                    raw_headers[index] = (RESPONSE_TIME_HEADER, header_value)
+                    break
+            else:
+                raw_headers.append((RESPONSE_TIME_HEADER, header_value))
+
+        elif message_type == "http.response.body":
+            self.duration()
+
+        await self.send(message)
 
 
 class PulseMiddleware:
@@ -37,50 +111,36 @@ class PulseMiddleware:
             prefix if prefix.startswith('/') else f'/{prefix}'
             for prefix in (exclude_path_prefixes or ())
         )
+        # Exact matches for each prefix plus "prefix/" subtree matches; the
+        # root prefix only ever matches "/" itself.
+        normalized = {prefix.rstrip('/') or '/' for prefix in self.exclude_path_prefixes}
+        self._exclude_exact = frozenset(normalized)
+        self._exclude_subtrees = tuple(sorted(f'{prefix}/' for prefix in normalized if prefix != '/'))
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process ASGI calls and record metrics for HTTP requests."""
-        if scope["type"] != "http":
+        if scope["type"] != "http" or self._should_skip_tracking(scope.get("path", "/")):
+            # Excluded paths (e.g. health checks) bypass the wrapper entirely.
             await self.app(scope, receive, send)
             return
 
-        headers = Headers(scope=scope)
-        correlation_id = headers.get("x-correlation-id", "unknown")
+        raw_correlation_id = _get_header(scope.get("headers") or (), b"x-correlation-id")
+        correlation_id = "unknown" if raw_correlation_id is None else raw_correlation_id.decode("latin-1")
         method = scope.get("method", "GET")
         raw_path = scope.get("path", "/")
-        skip_tracking = self._should_skip_tracking(raw_path)
-        endpoint_path = self._normalize_path(raw_path)
-        track_metrics = not skip_tracking
-
-        start_time = time.perf_counter()
-        status_code = 500
-        duration_ms: Optional[float] = None
-        response_started = False
-
-        async def send_wrapper(message: Message) -> None:
-            nonlocal status_code, duration_ms, response_started
+        root_path = scope.get("root_path", "")
+        # Resolved after routing so the matched route template can be used.
+        endpoint_path: Optional[str] = None
 
-            if message["type"] == "http.response.start":
-                response_started = True
-                status_code = message["status"]
-
-                # Ensure we can mutate headers and attach latency information.
-                raw_headers = message.setdefault("headers", [])
-                headers_obj = MutableHeaders(raw=raw_headers)
-                duration_ms = self._ensure_duration(duration_ms, start_time)
-                headers_obj["X-Response-Time-Ms"] = f"{duration_ms:.2f}"
-
-            elif message["type"] == "http.response.body":
-                duration_ms = self._ensure_duration(duration_ms, start_time)
-
-            await send(message)
+        tracker = _ResponseTracker(send, time.perf_counter_ns())
 
         request_failed = False
 
         try:
-            await self.app(scope, receive, send_wrapper)
+            await self.app(scope, receive, tracker)
         except Exception:
             request_failed = True
+            endpoint_path = self._resolve_endpoint_path(scope, root_path, raw_path)
             logger.exception(
                 "Unhandled exception while processing request",
                 extra={
@@ -90,10 +150,10 @@ class PulseMiddleware:
                 },
             )
 
-            duration_ms = self._ensure_duration(duration_ms, start_time)
+            duration_ms = tracker.duration()
 
-            if not response_started:
-                status_code = 500
+            if not tracker.response_started:
+                tracker.status_code = 500
                 await self._emit_fallback_response(send, duration_ms)
             else:
                 await send(
@@ -104,64 +164,79 @@ class PulseMiddleware:
                     }
                 )
         finally:
-            duration_ms = self._ensure_duration(duration_ms, start_time)
-            final_status = status_code if not request_failed else 500
+            duration_ms = tracker.duration()
+            final_status = tracker.status_code if not request_failed else 500
 
-            if track_metrics:
-                # Never let metrics collection crash user requests
+            if endpoint_path is None:
+                endpoint_path = self._resolve_endpoint_path(scope, root_path, raw_path)
+
+            # Never let metrics collection crash user requests
+            try:
+                self.metrics.record_request(
+                    endpoint=endpoint_path,
+                    method=method,
+                    status_code=final_status,
+                    duration_ms=duration_ms,
+                    correlation_id=correlation_id,
+                )
+            except Exception as e:
+                logger.exception(
+                    "Failed to record metrics (non-fatal)",
+                    extra={
+                        "error": str(e),
+                        "endpoint": endpoint_path,
+                        "method": method,
+                        "correlation_id": correlation_id
+                    }
+                )
+
+            if self.enable_detailed_logging and (
+                duration_ms > SLOW_REQUEST_THRESHOLD_MS or final_status >= 400
+            ):
                 try:
-                    self.metrics.record_request(
-                        endpoint=endpoint_path,
+                    self._log_performance_alert(
                         method=method,
+                        path=endpoint_path,
                         status_code=final_status,
                         duration_ms=duration_ms,
                         correlation_id=correlation_id,
                     )
                 except Exception as e:
                     logger.exception(
-                        "Failed to record metrics (non-fatal)",
-                        extra={
-                            "error": str(e),
-                            "endpoint": endpoint_path,
-                            "method": method,
-                            "correlation_id": correlation_id
-                        }
+                        "Failed to log performance alert (non-fatal)",
+                        extra={"error": str(e), "correlation_id": correlation_id}
                     )
 
-                if self.enable_detailed_logging and (
-                    duration_ms > SLOW_REQUEST_THRESHOLD_MS or final_status >= 400
-                ):
-                    try:
-                        self._log_performance_alert(
-                            method=method,
-                            path=endpoint_path,
-                            status_code=final_status,
-                            duration_ms=duration_ms,
-                            correlation_id=correlation_id,
-                        )
-                    except Exception as e:
-                        logger.exception(
-                            "Failed to log performance alert (non-fatal)",
-                            extra={"error": str(e), "correlation_id": correlation_id}
-                        )
+            try:
+                self._check_sla_violation(
+                    method=method,
+                    endpoint_path=endpoint_path,
+                    correlation_id=correlation_id,
+                )
+            except Exception as e:
+                logger.exception(
+                    "Failed to check SLA violation (non-fatal)",
+                    extra={"error": str(e), "correlation_id": correlation_id}
+                )
+
+    def _resolve_endpoint_path(self, scope: Scope, root_path: str, raw_path: str) -> str:
+        """Return the matched route template, falling back to a normalized path.
+
+        FastAPI records the matched route in ``scope["route"]``; its template
+        (e.g. ``/items/{item_id}``) matches the endpoint ids in the registry.
+        Mount prefixes added to ``root_path`` during routing are kept.
+        """
+        template = getattr(scope.get("route"), "path", None)
+        if not isinstance(template, str):
+            return self._normalize_path(raw_path)
+        mounted_root = scope.get("root_path", "")
+        if mounted_root != root_path and mounted_root.startswith(root_path):
+            return mounted_root[len(root_path):] + template
+        return template
 
-                try:
-                    self._check_sla_violation(
-                        method=method,
-                        endpoint_path=endpoint_path,
-                        correlation_id=correlation_id,
-                    )
-                except Exception as e:
-                    logger.exception(
-                        "Failed to check SLA violation (non-fatal)",
-                        extra={"error": str(e), "correlation_id": correlation_id}
-                    )
-    
     def _normalize_path(self, path: str) -> str:
         """Normalize path for metrics grouping."""
-        path = re.sub(r'/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '/{id}', path, flags=re.IGNORECASE)
-        path = re.sub(r'/\d+', '/{id}', path)
-        return path
+        return _normalize_path(path)
 
     def _log_performance_alert(self, method: str, path: str, status_code: int, duration_ms: float, correlation_id: str) -> None:
         log_level = (
@@ -185,53 +260,32 @@ class PulseMiddleware:
         )
 
     def _check_sla_violation(self, method: str, endpoint_path: str, correlation_id: str) -> None:
-        current_metrics = self.metrics.get_metrics()
         endpoint_key = f"{method} {endpoint_path}"
-        
-        if endpoint_key in current_metrics["endpoint_metrics"]:
-            endpoint_stats = current_metrics["endpoint_metrics"][endpoint_key]
-            p95_time = endpoint_stats.get("p95_response_time", 0)
-            
-            if p95_time > SLA_LATENCY_THRESHOLD_MS:  # SLA violation
-                logger.warning(
-                    "SLA violation detected",
-                    extra={
-                        "correlation_id": correlation_id,
-                        "endpoint": endpoint_key,
-                        "p95_response_time": p95_time,
-                        "sla_limit": SLA_LATENCY_THRESHOLD_MS,
-                        "violation_type": "latency_sla"
-                    }
-                )
+        # Last derived value; a per-request check must not force a drain.
+        p95_time = self.metrics.peek_p95_response_time(endpoint_key)
 
-    def _ensure_duration(self, cached_duration: Optional[float], start_time: float) -> float:
-        """Return the cached duration if present, otherwise compute it."""
-        if cached_duration is not None:
-            return cached_duration
-        return (time.perf_counter() - start_time) * 1000
+        if p95_time is not None and p95_time > SLA_LATENCY_THRESHOLD_MS:  # SLA violation
+            logger.warning(
+                "SLA violation detected",
+                extra={
+                    "correlation_id": correlation_id,
+                    "endpoint": endpoint_key,
+                    "p95_response_time": p95_time,
+                    "sla_limit": SLA_LATENCY_THRESHOLD_MS,
+                    "violation_type": "latency_sla"
+                }
+            )
 
     def _should_skip_tracking(self, path: str) -> bool:
-        for prefix in self.exclude_path_prefixes:
-            normalized = prefix.rstrip('/') or '/'
-            if path == normalized:
-                return True
-            if normalized != '/' and path.startswith(normalized + '/'):
-                return True
-        return False
+        return path in self._exclude_exact or path.startswith(self._exclude_subtrees)
 
     async def _emit_fallback_response(self, send: Send, duration_ms: float) -> None:
         """Send a JSON 500 response when the downstream app fails early."""
-        headers_list: list[tuple[bytes, bytes]] = []
-        headers_obj = MutableHeaders(raw=headers_list)
-        headers_obj["content-type"] = "application/json"
-        headers_obj["content-length"] = str(len(DEFAULT_ERROR_BODY))
-        headers_obj["X-Response-Time-Ms"] = f"{duration_ms:.2f}"
-
         await send(
             {
                 "type": "http.response.start",
                 "status": 500,
-                "headers": headers_list,
+                "headers": [*_FALLBACK_HEADERS, (RESPONSE_TIME_HEADER, b"%.2f" % duration_ms)],
             }
         )
         await send(
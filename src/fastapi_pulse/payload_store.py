@@ -2,45 +2,153 @@
 
 from __future__ import annotations
 
+import atexit
 import json
+import os
 import re
+import sys
 import threading
+import weakref
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .serialization import dumps
+
 # Security limits to prevent abuse
 MAX_PAYLOAD_SIZE_BYTES = 1024 * 1024  # 1MB per payload
 MAX_TOTAL_STORAGE_BYTES = 10 * 1024 * 1024  # 10MB total storage
 ENDPOINT_ID_PATTERN = re.compile(r'^[A-Z]+ /[a-zA-Z0-9/_\-{}]+$')
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.5
+_LOCK_SHARDS = 16  # power of two so the shard index is a mask
+
+# Stores with writes that may still be pending; flushed at interpreter exit.
+_LIVE_STORES: "weakref.WeakSet[PulsePayloadStore]" = weakref.WeakSet()
+
+
+def _flush_live_stores() -> None:
+    for store in list(_LIVE_STORES):
+        store.flush()
+
+
+atexit.register(_flush_live_stores)
 
 
 class PulsePayloadStore:
-    """Manages persistent custom payload overrides for endpoints."""
+    """Manages persistent custom payload overrides for endpoints.
+
+    Writes are coalesced: ``set``/``delete`` mark the store dirty and the file
+    is rewritten at most once per ``flush_interval`` seconds (immediately when
+    the interval is 0). Call ``flush()`` to persist pending changes right away.
+
+    Each entry's ``"id":{...}`` JSON fragment is cached next to the decoded
+    payload, so a flush only joins bytes instead of re-encoding every entry.
+
+    Mutations lock one of ``_LOCK_SHARDS`` locks picked by endpoint id, so
+    writers touching different endpoints do not contend; only scheduling and
+    writing the file goes through the coarse ``_flush_lock``.
+
+    The storage cap is checked against ``_total_bytes``, the size the next
+    flush will write (counting one separator per entry, so at most one byte
+    high), because the file on disk lags behind while writes are coalesced.
+
+    Set ``durable=True`` to ``fsync`` each write before it replaces the file.
+    """
 
-    def __init__(self, file_path: Path) -> None:
+    def __init__(
+        self,
+        file_path: Path,
+        *,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        durable: bool = False,
+    ) -> None:
         self.file_path = file_path
-        self._lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.durable = durable
+        # Resolved now: a deferred flush must not follow later chdir() calls.
+        self._path_str = os.path.abspath(file_path)
+        self._tmp_str = os.path.abspath(file_path.with_suffix(".tmp"))
+        self._parent_ready = False
+        self._locks = [threading.Lock() for _ in range(_LOCK_SHARDS)]
+        self._flush_lock = threading.Lock()
         self._payloads: Dict[str, Dict[str, Any]] = {}
+        self._fragments: Dict[str, bytes] = {}
+        self._size_lock = threading.Lock()
+        self._total_bytes = 2  # the enclosing "{}"
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
         self._load()
+        _LIVE_STORES.add(self)
 
     def _load(self) -> None:
         if not self.file_path.exists():
             return
         try:
-            with self.file_path.open("r", encoding="utf-8") as handle:
-                data = json.load(handle)
+            # Read once at startup with the stdlib parser, which keeps
+            # integers wider than 64 bits exact (orjson turns them into floats).
+            data = json.loads(self.file_path.read_bytes())
             if isinstance(data, dict):
-                self._payloads = data
+                self._payloads = {sys.intern(key): value for key, value in data.items()}
+                self._fragments = {
+                    endpoint_id: self._fragment(endpoint_id, dumps(payload))
+                    for endpoint_id, payload in self._payloads.items()
+                }
+                self._total_bytes = 2 + sum(
+                    len(fragment) + 1 for fragment in self._fragments.values()
+                )
         except Exception:
             # If the file is corrupted, ignore and start fresh.
             self._payloads = {}
+            self._fragments = {}
+            self._total_bytes = 2
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        with self._flush_lock:
+            timer = self._flush_timer
+            self._flush_timer = None
+            if timer is not None:
+                timer.cancel()
+            if self._dirty:
+                self._flush()
+
+    def _mark_dirty(self) -> None:
+        """Record a change and schedule a write."""
+        with self._flush_lock:
+            self._dirty = True
+            if self.flush_interval <= 0:
+                self._flush()
+                return
+            if self._flush_timer is None:
+                timer = threading.Timer(self.flush_interval, self.flush)
+                timer.daemon = True
+                self._flush_timer = timer
+                timer.start()
+
+    @staticmethod
+    def _fragment(endpoint_id: str, encoded_payload: bytes) -> bytes:
+        return dumps(endpoint_id) + b":" + encoded_payload
+
+    def _lock_for(self, endpoint_id: str) -> threading.Lock:
+        return self._locks[hash(endpoint_id) & (_LOCK_SHARDS - 1)]
 
     def _flush(self) -> None:
-        self.file_path.parent.mkdir(parents=True, exist_ok=True)
-        tmp_path = self.file_path.with_suffix(".tmp")
-        with tmp_path.open("w", encoding="utf-8") as handle:
-            json.dump(self._payloads, handle, indent=2, ensure_ascii=False)
-        tmp_path.replace(self.file_path)
+        # Called with _flush_lock held. Taking the fragments is atomic under
+        # the GIL, so shard-locked writers never race the join.
+        data = b"{" + b",".join(tuple(self._fragments.values())) + b"}"
+        if not self._parent_ready:
+            os.makedirs(os.path.dirname(self._path_str) or ".", exist_ok=True)
+            self._parent_ready = True
+        fd = os.open(self._tmp_str, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if self.durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(self._tmp_str, self._path_str)
+        self._dirty = False
 
     def get(self, endpoint_id: str) -> Optional[Dict[str, Any]]:
         return self._payloads.get(endpoint_id)
@@ -53,55 +161,67 @@ class PulsePayloadStore:
                 f"Expected format: 'METHOD /path' (e.g., 'GET /users/{{id}}')"
             )
 
+        # Ids repeat across every request for the same endpoint; interning
+        # lets dict lookups short-circuit on identity.
+        endpoint_id = sys.intern(endpoint_id)
+
         # Sanitize and validate payload
         cleaned = self._sanitize_payload(payload)
 
         # Check individual payload size
-        payload_json = json.dumps(cleaned, ensure_ascii=False)
-        payload_size = len(payload_json.encode('utf-8'))
+        encoded = dumps(cleaned)
+        payload_size = len(encoded)
         if payload_size > MAX_PAYLOAD_SIZE_BYTES:
             raise ValueError(
                 f"Payload too large: {payload_size} bytes. "
                 f"Maximum allowed: {MAX_PAYLOAD_SIZE_BYTES} bytes ({MAX_PAYLOAD_SIZE_BYTES // 1024}KB)"
             )
 
-        with self._lock:
-            # Check total storage size before adding
-            if self.file_path.exists():
-                current_size = self.file_path.stat().st_size
-                if endpoint_id not in self._payloads and current_size > MAX_TOTAL_STORAGE_BYTES:
+        fragment = self._fragment(endpoint_id, encoded)
+        with self._lock_for(endpoint_id):
+            previous = self._fragments.get(endpoint_id)
+            if previous is not None:
+                growth = len(fragment) - len(previous)
+            else:
+                growth = len(fragment) + 1  # plus its "," separator
+            with self._size_lock:
+                # Check total storage size, including unflushed writes, before adding
+                current_size = self._total_bytes
+                if growth > 0 and current_size + growth > MAX_TOTAL_STORAGE_BYTES:
                     raise ValueError(
                         f"Storage limit exceeded. Current: {current_size} bytes, "
                         f"Maximum: {MAX_TOTAL_STORAGE_BYTES} bytes ({MAX_TOTAL_STORAGE_BYTES // 1024 // 1024}MB)"
                     )
+                self._total_bytes = current_size + growth
 
             self._payloads[endpoint_id] = cleaned
-            self._flush()
+            self._fragments[endpoint_id] = fragment
+        self._mark_dirty()
         return cleaned
 
     def delete(self, endpoint_id: str) -> None:
-        with self._lock:
-            if endpoint_id in self._payloads:
-                del self._payloads[endpoint_id]
-                self._flush()
+        with self._lock_for(endpoint_id):
+            removed = self._payloads.pop(endpoint_id, None) is not None
+            fragment = self._fragments.pop(endpoint_id, None)
+            if fragment is not None:
+                with self._size_lock:
+                    self._total_bytes -= len(fragment) + 1
+        if removed:
+            self._mark_dirty()
 
     def all(self) -> Dict[str, Dict[str, Any]]:
         return dict(self._payloads)
 
     @staticmethod
     def _sanitize_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
-        path_params = payload.get("path_params") or {}
-        query_params = payload.get("query") or {}
-        headers = payload.get("headers") or {}
-        body = payload.get("body") if "body" in payload else None
-        media_type = payload.get("media_type")
-
+        """Keep only the known payload fields; missing mappings become ``{}``."""
+        get = payload.get
         return {
-            "path_params": path_params,
-            "query": query_params,
-            "headers": headers,
-            "body": body,
-            "media_type": media_type,
+            "path_params": get("path_params") or {},
+            "query": get("query") or {},
+            "headers": get("headers") or {},
+            "body": get("body"),
+            "media_type": get("media_type"),
         }
 
 
@@ -4,13 +4,18 @@ from __future__ import annotations
 
 import hashlib
 import json
+import re
 from dataclasses import asdict, dataclass, field
-from typing import Any, Dict, Iterable, List, Optional
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional
 
-from fastapi import FastAPI
+if TYPE_CHECKING:
+    from fastapi import FastAPI
 
 ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"}
 DEFAULT_MANAGEMENT_PREFIXES = {"/health/pulse"}
+# Endpoints are ordered by (path, method); attrgetter builds the tuple in C.
+_SORT_KEY = attrgetter("path", "method")
 
 
 @dataclass(frozen=True)
@@ -44,19 +49,47 @@ class PulseEndpointRegistry:
         self.app = app
         self._endpoints: List[EndpointInfo] = []
         self._schema_hash: Optional[str] = None
+        # Number of times the schema was actually (re)parsed; lets tests pin
+        # down that unchanged schemas hit the cache.
+        self._parse_calls = 0
         self._openapi_schema: Dict[str, Any] = {}
         prefixes = set(DEFAULT_MANAGEMENT_PREFIXES)
         if exclude_prefixes:
             for prefix in exclude_prefixes:
                 normalized = prefix if prefix.startswith('/') else f'/{prefix}'
-                prefixes.add(normalized)
+                prefixes.add(normalized.rstrip('/') or '/')
         self._exclude_prefixes = tuple(sorted(prefixes))
+        self._exclude_re = self._compile_exclude_pattern(self._exclude_prefixes)
+
+    @staticmethod
+    def _compile_exclude_pattern(prefixes: Iterable[str]) -> re.Pattern:
+        """Build one anchored pattern matching any prefix on a path-segment boundary.
+
+        The root prefix ``/`` only matches the root path itself.
+        """
+        alternatives = "|".join(
+            re.escape(prefix) for prefix in sorted(prefixes, key=len, reverse=True) if prefix != "/"
+        )
+        patterns = []
+        if alternatives:
+            patterns.append(f"(?:{alternatives})(?:/|$)")
+        if "/" in prefixes:
+            patterns.append("/$")
+        return re.compile("|".join(patterns) or "(?!)")
+
+    def is_excluded(self, path: str) -> bool:
+        """Return True when *path* falls under one of the excluded prefixes."""
+        return self._exclude_re.match(path) is not None
 
     def refresh(self) -> None:
         """Refresh endpoint metadata when OpenAPI schema changes."""
         schema = self.app.openapi()
+        if not isinstance(schema, Mapping):
+            schema = {}
         self._openapi_schema = schema
-        paths = schema.get("paths", {})
+        paths = schema.get("paths")
+        if not isinstance(paths, dict):
+            paths = {}
         schema_hash = hashlib.sha256(
             json.dumps(paths, sort_keys=True, separators=(",", ":")).encode("utf-8")
         ).hexdigest()
@@ -64,16 +97,17 @@ class PulseEndpointRegistry:
         if schema_hash == self._schema_hash:
             return
 
+        self._parse_calls += 1
         endpoints: List[EndpointInfo] = []
         for path, operations in paths.items():
-            if any(path.startswith(prefix) for prefix in self._exclude_prefixes):
+            if self.is_excluded(path):
                 continue
 
-            common_parameters = operations.get("parameters", []) if isinstance(operations, dict) else []
-
             if not isinstance(operations, dict):
                 continue
 
+            common_parameters = operations.get("parameters") or []
+
             for method, operation in operations.items():
                 if method.lower() == "parameters":
                     continue
@@ -83,18 +117,21 @@ class PulseEndpointRegistry:
                 if not isinstance(operation, dict):
                     continue
 
-                parameters = list(common_parameters)
-                parameters.extend(operation.get("parameters", []))
-
-                path_parameters = [
-                    param for param in parameters if param.get("in") == "path"
-                ]
-                query_parameters = [
-                    param for param in parameters if param.get("in") == "query"
-                ]
-                header_parameters = [
-                    param for param in parameters if param.get("in") == "header"
-                ]
+                path_parameters: List[Dict[str, Any]] = []
+                query_parameters: List[Dict[str, Any]] = []
+                header_parameters: List[Dict[str, Any]] = []
+                by_location = {
+                    "path": path_parameters,
+                    "query": query_parameters,
+                    "header": header_parameters,
+                }
+                for params in (common_parameters, operation.get("parameters") or []):
+                    for param in params:
+                        if not isinstance(param, dict):
+                            continue
+                        bucket = by_location.get(param.get("in"))
+                        if bucket is not None:
+                            bucket.append(param)
 
                 has_path_params = bool(path_parameters)
 
@@ -117,11 +154,13 @@ class PulseEndpointRegistry:
                         if selected_media_type is None:
                             selected_media_type = next(iter(content.keys()))
                         request_body_media_type = selected_media_type
-                        request_body_schema = content[selected_media_type].get("schema")
+                        media = content[selected_media_type]
+                        if isinstance(media, dict):
+                            request_body_schema = media.get("schema")
 
                 has_request_body = request_body_schema is not None
                 required_query = any(
-                    param.get("required") and param.get("schema", {}).get("default") is None
+                    param.get("required") and (param.get("schema") or {}).get("default") is None
                     for param in query_parameters
                 )
                 requires_input = has_path_params or has_request_body or required_query
@@ -143,7 +182,7 @@ class PulseEndpointRegistry:
                 )
                 endpoints.append(endpoint)
 
-        endpoints.sort(key=lambda e: (e.path, e.method))
+        endpoints.sort(key=_SORT_KEY)
         self._endpoints = endpoints
         self._schema_hash = schema_hash
 
@@ -154,11 +193,15 @@ class PulseEndpointRegistry:
 
     def get_endpoint_map(self) -> Dict[str, EndpointInfo]:
         """Return endpoints keyed by their identifier."""
-        return {endpoint.id: endpoint for endpoint in self.list_endpoints()}
+        self.refresh()
+        return {endpoint.id: endpoint for endpoint in self._endpoints}
 
     def auto_probe_targets(self) -> List[EndpointInfo]:
         """Return endpoints that can be automatically probed."""
-        return [endpoint for endpoint in self.list_endpoints() if not endpoint.requires_input]
+        self.refresh()
+        # refresh() swaps in a new list rather than mutating it, so iterating
+        # the cached list directly is safe and skips list_endpoints()' copy.
+        return [endpoint for endpoint in self._endpoints if not endpoint.requires_input]
 
     @property
     def openapi_schema(self) -> Dict[str, Any]:
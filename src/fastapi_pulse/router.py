@@ -4,21 +4,24 @@ from __future__ import annotations
 
 from copy import deepcopy
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Body, HTTPException, Request
+from fastapi import APIRouter, Body, HTTPException, Request, Response
 from pydantic import BaseModel
 
 from .constants import (
     PULSE_ENDPOINT_REGISTRY_KEY,
     PULSE_PAYLOAD_STORE_KEY,
     PULSE_PROBE_MANAGER_KEY,
+    PULSE_STATE_KEY,
 )
 from .metrics import PulseMetrics
 from .payload_store import PulsePayloadStore
 from .probe import PulseProbeManager
 from .registry import EndpointInfo, PulseEndpointRegistry
 from .sample_builder import SamplePayloadBuilder
+from .serialization import dumps
 
 
 class ProbeRequest(BaseModel):
@@ -39,6 +42,11 @@ class ProbeStartResponse(BaseModel):
     total: int
 
 
+def _get_metrics(request: Request, default: PulseMetrics) -> PulseMetrics:
+    """Return the app's current metrics collector, if one was installed."""
+    return getattr(request.app.state, PULSE_STATE_KEY, None) or default
+
+
 def _get_registry(request: Request) -> PulseEndpointRegistry:
     registry = getattr(request.app.state, PULSE_ENDPOINT_REGISTRY_KEY, None)
     if registry is None:
@@ -60,6 +68,12 @@ def _get_payload_store(request: Request) -> PulsePayloadStore:
     return store
 
 
+@lru_cache(maxsize=4096)
+def _iso_from_ts(timestamp: float) -> str:
+    """Format a probe timestamp as UTC ISO-8601; repeated results reuse the string."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
 def _serialize_probe_result(result) -> Dict[str, Any]:
     if result is None:
         return {
@@ -72,34 +86,52 @@ def _serialize_probe_result(result) -> Dict[str, Any]:
             "payload": None,
         }
 
-    checked_at_iso = None
-    if result.checked_at is not None:
-        checked_at_iso = datetime.fromtimestamp(result.checked_at, tz=timezone.utc).isoformat()
-
+    checked_at = result.checked_at
     return {
         "status": result.status,
         "status_code": result.status_code,
         "latency_ms": result.latency_ms,
         "error": result.error,
-        "checked_at": result.checked_at,
-        "checked_at_iso": checked_at_iso,
+        "checked_at": checked_at,
+        "checked_at_iso": _iso_from_ts(checked_at) if checked_at is not None else None,
         "payload": result.payload,
     }
 
 
+# Shared by every endpoint that has not served traffic yet; treat as read-only.
+_EMPTY_METRICS: Dict[str, Any] = {
+    "total_requests": 0,
+    "success_count": 0,
+    "error_count": 0,
+    "avg_response_time": None,
+    "p95_response_time": None,
+    "error_rate": 0,
+}
+
+
 def _serialize_endpoint(
     endpoint: EndpointInfo,
-    endpoint_metrics: Dict[str, Any],
+    metrics_snapshot: Optional[Dict[str, Any]],
     probe_result,
     payload_info: Dict[str, Any],
 ) -> Dict[str, Any]:
-    metrics_snapshot = endpoint_metrics.get(endpoint.id, {})
-    total_requests = metrics_snapshot.get("total_requests", 0)
-    error_count = metrics_snapshot.get("error_count", 0)
-    error_rate = (
-        (error_count / total_requests) * 100
-        if total_requests else 0
-    )
+    if metrics_snapshot:
+        total_requests = metrics_snapshot.get("total_requests", 0)
+        error_count = metrics_snapshot.get("error_count", 0)
+        error_rate = (
+            (error_count / total_requests) * 100
+            if total_requests else 0
+        )
+        endpoint_stats = {
+            "total_requests": total_requests,
+            "success_count": metrics_snapshot.get("success_count", 0),
+            "error_count": error_count,
+            "avg_response_time": metrics_snapshot.get("avg_response_time"),
+            "p95_response_time": metrics_snapshot.get("p95_response_time"),
+            "error_rate": error_rate,
+        }
+    else:
+        endpoint_stats = _EMPTY_METRICS
     return {
         "id": endpoint.id,
         "method": endpoint.method,
@@ -107,14 +139,7 @@ def _serialize_endpoint(
         "summary": endpoint.summary,
         "tags": endpoint.tags,
         "requires_input": endpoint.requires_input,
-        "metrics": {
-            "total_requests": total_requests,
-            "success_count": metrics_snapshot.get("success_count", 0),
-            "error_count": error_count,
-            "avg_response_time": metrics_snapshot.get("avg_response_time"),
-            "p95_response_time": metrics_snapshot.get("p95_response_time"),
-            "error_rate": error_rate,
-        },
+        "metrics": endpoint_stats,
         "last_probe": _serialize_probe_result(probe_result),
         "payload": payload_info,
     }
@@ -125,9 +150,10 @@ def create_pulse_router(metrics: PulseMetrics) -> APIRouter:
 
     router = APIRouter(prefix="/health", tags=["Pulse Metrics"])
 
-    @router.get("/pulse", response_model_exclude_none=True)
-    def get_pulse_metrics():
-        performance_metrics = metrics.get_metrics()
+    @router.get("/pulse")
+    def get_pulse_metrics(request: Request):
+        collector = _get_metrics(request, metrics)
+        performance_metrics = collector.get_metrics()
 
         summary = performance_metrics.get("summary", {})
         error_rate = summary.get("error_rate", 0)
@@ -146,22 +172,30 @@ def create_pulse_router(metrics: PulseMetrics) -> APIRouter:
         else:
             overall_sla_met = latency_sla_met and error_rate_sla_met
 
-        response_data = {
-            "performance_metrics": performance_metrics,
-            "sla_compliance": {
-                "latency_sla_met": latency_sla_met,
-                "error_rate_sla_met": error_rate_sla_met,
-                "overall_sla_met": overall_sla_met,
-                "details": {
-                    "p95_response_time": f"{p95_response_time:.2f}ms",
-                    "p95_response_time_sla": "200ms",
-                    "error_rate": f"{error_rate:.2f}%",
-                    "error_rate_sla": "5%",
-                },
+        sla_compliance = {
+            "latency_sla_met": latency_sla_met,
+            "error_rate_sla_met": error_rate_sla_met,
+            "overall_sla_met": overall_sla_met,
+            "details": {
+                "p95_response_time": f"{p95_response_time:.2f}ms",
+                "p95_response_time_sla": "200ms",
+                "error_rate": f"{error_rate:.2f}%",
+                "error_rate_sla": "5%",
             },
         }
 
-        return response_data
+        # The metrics snapshot is pre-encoded and cached by the collector, so
+        # only the small SLA block is serialized per poll.
+        content = b"".join(
+            (
+                b'{"performance_metrics":',
+                collector.get_metrics_bytes(performance_metrics),
+                b',"sla_compliance":',
+                dumps(sla_compliance),
+                b"}",
+            )
+        )
+        return Response(content=content, media_type="application/json")
 
     @router.get("/pulse/endpoints")
     def list_endpoints(request: Request):
@@ -171,7 +205,7 @@ def create_pulse_router(metrics: PulseMetrics) -> APIRouter:
         builder = SamplePayloadBuilder(registry.openapi_schema)
 
         endpoints = registry.list_endpoints()
-        metrics_snapshot = metrics.get_metrics().get("endpoint_metrics", {})
+        metrics_snapshot = _get_metrics(request, metrics).get_metrics().get("endpoint_metrics", {})
         last_job = manager.last_job()
         probe_results = last_job.results if last_job else {}
         payload_entries = []
@@ -207,7 +241,7 @@ def create_pulse_router(metrics: PulseMetrics) -> APIRouter:
             payload_entries.append(
                 _serialize_endpoint(
                     endpoint,
-                    metrics_snapshot,
+                    metrics_snapshot.get(endpoint.id),
                     probe_results.get(endpoint.id),
                     payload_info,
                 )
@@ -12,6 +12,7 @@ class SamplePayloadBuilder:
     def __init__(self, openapi_schema: Dict[str, Any]):
         self.openapi_schema = openapi_schema or {}
         self.components = self.openapi_schema.get("components", {})
+        self._ref_cache: Dict[str, Dict[str, Any]] = {}
 
     def build(self, endpoint: EndpointInfo) -> Dict[str, Any]:
         path_params = {
@@ -51,18 +52,22 @@ class SamplePayloadBuilder:
         return self._value_from_schema(schema)
 
     def _resolve_ref(self, ref: str) -> Dict[str, Any]:
-        if not ref or not ref.startswith("#/"):
-            return {}
-        parts = ref.lstrip("#/").split("/")
-        current: Any = self.openapi_schema
-        for part in parts:
-            if isinstance(current, dict):
-                current = current.get(part)
-            else:
-                current = None
-            if current is None:
-                break
-        return current or {}
+        cached = self._ref_cache.get(ref)
+        if cached is not None:
+            return cached
+        resolved: Any = None
+        if ref and ref.startswith("#/"):
+            resolved = self.openapi_schema
+            for part in ref.lstrip("#/").split("/"):
+                if isinstance(resolved, dict):
+                    resolved = resolved.get(part)
+                else:
+                    resolved = None
+                if resolved is None:
+                    break
+        resolved = resolved or {}
+        self._ref_cache[ref] = resolved
+        return resolved
 
     def _value_from_schema(self, schema: Optional[Dict[str, Any]], depth: int = 0) -> Any:
         if not schema or depth > 8:
@@ -0,0 +1,56 @@
+"""Shared pytest configuration."""
+
+import os
+import sys
+
+import pytest
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    _loads = json.loads
+
+try:
+    import uvloop
+
+    UVLOOP_AVAILABLE = sys.platform != "win32"
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT_DIR, "tests", "fixtures")
+
+
+if UVLOOP_AVAILABLE:
+
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop when it is installed."""
+        return {"uvloop": uvloop.new_event_loop}
+
+
+@pytest.fixture(scope="session")
+def sample_openapi_schema():
+    """Minimal OpenAPI document, parsed once per session; tests must not mutate it."""
+    with open(os.path.join(FIXTURES_DIR, "openapi.json"), "rb") as fh:
+        return _loads(fh.read())
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cwd(tmp_path, monkeypatch):
+    """Run each test in its own directory.
+
+    ``add_pulse`` stores probe payloads in ``pulse_probes.json`` relative to the
+    working directory; a per-test cwd keeps that file out of the checkout and
+    lets tests run in parallel (``pytest -n auto``) without sharing it. The
+    checkout stays importable for CLI subprocesses loading ``tests.*`` apps.
+    """
+    pythonpath = os.environ.get("PYTHONPATH")
+    monkeypatch.setenv(
+        "PYTHONPATH",
+        ROOT_DIR if not pythonpath else os.pathsep.join((ROOT_DIR, pythonpath)),
+    )
+    monkeypatch.chdir(tmp_path)
@@ -5,9 +5,25 @@ from __future__ import annotations
 import importlib
 from pathlib import Path
 
+import pytest
 from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
-from fastapi_pulse import add_pulse
+from fastapi_pulse import (
+    PULSE_PROBE_MANAGER_KEY,
+    PULSE_STATE_KEY,
+    PulseMetrics,
+    _get_static_dir,
+    add_pulse,
+)
+
+
+@pytest.fixture
+def fresh_static_dir():
+    """Reset the cached dashboard directory around a test."""
+    _get_static_dir.cache_clear()
+    yield
+    _get_static_dir.cache_clear()
 
 
 def _get_cors_middleware(app: FastAPI):
@@ -32,15 +48,20 @@ def test_add_pulse_reads_env_origins(monkeypatch):
     assert set(middleware.kwargs["allow_origins"]) == {"https://foo.test", "https://bar.test"}
 
 
-def test_add_pulse_uses_importlib_files_when_available(monkeypatch, tmp_path):
+def test_add_pulse_uses_importlib_files_when_available(monkeypatch, tmp_path, fresh_static_dir):
     app = FastAPI()
+    calls = []
 
     class DummyFiles:
         def __truediv__(self, item: str):
             assert item == "static"
             return tmp_path
 
-    monkeypatch.setattr(importlib.resources, "files", lambda *_: DummyFiles(), raising=False)
+    def fake_files(*_):
+        calls.append(1)
+        return DummyFiles()
+
+    monkeypatch.setattr(importlib.resources, "files", fake_files, raising=False)
     mounted = {}
 
     def fake_mount(route, static_files, name):
@@ -50,6 +71,12 @@ def test_add_pulse_uses_importlib_files_when_available(monkeypatch, tmp_path):
     add_pulse(app, enable_cors=False)
     assert mounted["directory"] == str(tmp_path)
 
+    # The directory is resolved once and reused by later installs.
+    other = FastAPI()
+    monkeypatch.setattr(other, "mount", fake_mount)
+    add_pulse(other, enable_cors=False)
+    assert len(calls) == 1
+
 
 def test_add_pulse_logs_when_mount_fails(monkeypatch, caplog):
     app = FastAPI()
@@ -61,3 +88,30 @@ def test_add_pulse_logs_when_mount_fails(monkeypatch, caplog):
     caplog.set_level("WARNING")
     add_pulse(app, enable_cors=False)
     assert "Could not mount pulse dashboard" in caplog.text
+
+
+def test_add_pulse_twice_only_swaps_metrics():
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    first = PulseMetrics()
+    add_pulse(app, enable_cors=False, metrics=first)
+    middleware_count = len(app.user_middleware)
+    route_count = len(app.routes)
+
+    second = PulseMetrics()
+    add_pulse(app, enable_cors=False, metrics=second)
+    assert len(app.user_middleware) == middleware_count
+    assert len(app.routes) == route_count
+    assert getattr(app.state, PULSE_STATE_KEY) is second
+    assert getattr(app.state, PULSE_PROBE_MANAGER_KEY).metrics is second
+
+    with TestClient(app) as client:
+        client.get("/ping")
+        data = client.get("/health/pulse").json()
+
+    assert data["performance_metrics"]["request_counts"] == {"GET /ping": 1}
+    assert first.get_metrics()["request_counts"] == {}
@@ -2,9 +2,22 @@
 Tests for the core PulseMetrics collector.
 """
 
+import json
+
 import pytest
 import numpy as np
-from fastapi_pulse.metrics import PulseMetrics, RollingWindowDigest
+from fastapi_pulse.metrics import PSquareEstimator, PulseMetrics, RollingWindowDigest
+
+
+class FakeClock:
+    """Manually advanced time source for window tests."""
+
+    def __init__(self, t: float = 1_000_000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
 
 def test_initial_state():
     """Verify that a new PulseMetrics instance is empty."""
@@ -21,6 +34,8 @@ def test_initial_state():
         (302, 1, 0),  # Redirects are successes
         (404, 0, 1),  # Client error
         (500, 0, 1),  # Server error
+        (599, 0, 1),  # Highest 5xx
+        (1204, 0, 1),  # Out-of-range codes count as errors
     ],
 )
 def test_record_request_increments_counts(status_code, success_count, error_count):
@@ -80,40 +95,196 @@ def test_percentile_with_insufficient_data():
     assert "p95_response_time" not in summary
 
 
-def test_rolling_window_total_and_trim(monkeypatch):
-    digest = RollingWindowDigest(window_seconds=1, bucket_seconds=1)
-    now = 1_000_000.0
+def test_rolling_window_total_and_trim():
+    clock = FakeClock()
+    digest = RollingWindowDigest(window_seconds=1, bucket_seconds=1, time_fn=clock)
+    now = clock.t
     digest.add(5.0, timestamp=now - 5)
-    digest.add(10.0, timestamp=now)
-    monkeypatch.setattr("fastapi_pulse.metrics.time.time", lambda: now)
+    digest.add(10.0)
     assert digest.total() == 10.0
     assert digest.count() == 1
 
 
-def test_rolling_window_percentile_handles_sparse_data(monkeypatch):
-    class FakeTDigest:
-        def __init__(self, *args, **kwargs):
-            self.n = 0
+def test_rolling_window_reuses_ring_slots():
+    clock = FakeClock()
+    digest = RollingWindowDigest(window_seconds=2, bucket_seconds=1, time_fn=clock)
+    now = clock.t
+    for offset in range(6):
+        digest.add(1.0, timestamp=now + offset)
+    # A late sample for a slot already holding a newer bucket is dropped.
+    digest.add(100.0, timestamp=now + 2)
+    clock.t = now + 5
+    assert len(digest._starts) == 3
+    assert digest.count() == 3
+    assert digest.total() == 3.0
 
-        def update(self, value):
-            self.n += 1
 
-        def __add__(self, other):
-            new = FakeTDigest()
-            new.n = 1
-            return new
+def test_rolling_window_tracks_oldest_bucket_for_trim():
+    clock = FakeClock(1_000.0)
+    digest = RollingWindowDigest(window_seconds=120, bucket_seconds=60, time_fn=clock)
+    digest.add(1.0)
+    digest.add(2.0, timestamp=clock.t + 60)
+    assert digest._oldest_start == 960.0
 
-        def percentile(self, _):
-            return 42.0
+    clock.t += 100
+    assert digest.count() == 1
+    assert digest._oldest_start == 1020.0
 
-        def compress(self):
-            pass
+    clock.t += 600
+    assert digest.count() == 0
+    assert digest._oldest_start is None
 
-    monkeypatch.setattr("fastapi_pulse.metrics.TDigest", FakeTDigest)
+
+def test_rolling_window_percentile_handles_sparse_data():
     digest = RollingWindowDigest()
+    assert digest.percentile(95) is None
     digest.add(1.0)
-    digest.add(2.0)
     assert digest.percentile(95) is None
+    digest.add(2.0)
+    assert digest.percentile(95) == pytest.approx(1.95)
+
+
+def test_rolling_window_answers_untracked_percentiles():
+    digest = RollingWindowDigest(quantiles=(95,))
+    samples = [float(v) for v in range(1, 201)]
+    for value in samples:
+        digest.add(value)
+    # 50 has no P-Square estimator, so it is read from the histogram.
+    assert digest.percentile(50) == pytest.approx(np.percentile(samples, 50), rel=0.02)
+
+
+def test_rolling_window_merges_exact_buckets():
+    """Small buckets are merged sample-for-sample across the window."""
+    clock = FakeClock(0.0)
+    digest = RollingWindowDigest(window_seconds=300, bucket_seconds=60, time_fn=clock)
+    samples = []
+    for bucket in range(5):
+        for step in range(10):
+            value = float(bucket * 10 + step)
+            digest.add(value, timestamp=bucket * 60.0)
+            samples.append(value)
+    clock.t = 240.0
+    for quantile in (50, 95, 99):
+        assert digest.percentile(quantile) == pytest.approx(np.percentile(samples, quantile))
+
+
+def test_rolling_window_outlier_bucket_is_not_averaged_away():
+    clock = FakeClock(0.0)
+    digest = RollingWindowDigest(window_seconds=300, bucket_seconds=60, time_fn=clock)
+    samples = [10.0] * 99 + [1000.0]
+    for value in samples[:99]:
+        digest.add(value, timestamp=0.0)
+    digest.add(1000.0, timestamp=60.0)
+    clock.t = 60.0
+    assert digest.percentile(99) == pytest.approx(np.percentile(samples, 99), rel=0.02)
+    assert digest.percentile(100) == pytest.approx(1000.0, rel=0.02)
+
+
+@pytest.mark.parametrize("quantile", [50, 95, 99])
+def test_rolling_window_skewed_buckets_track_numpy_percentile(quantile):
+    """Overflowed buckets with very different latency profiles merge correctly."""
+    clock = FakeClock(0.0)
+    digest = RollingWindowDigest(window_seconds=300, bucket_seconds=60, time_fn=clock)
+    rng = np.random.default_rng(1)
+    samples = []
+    for bucket, (scale, size) in enumerate([(5.0, 2000), (50.0, 300), (500.0, 40), (20.0, 800)]):
+        for value in rng.exponential(scale=scale, size=size):
+            digest.add(float(value), timestamp=bucket * 60.0)
+            samples.append(float(value))
+    clock.t = 180.0
+
+    expected = np.percentile(samples, quantile, method="linear")
+    assert digest.percentile(quantile) == pytest.approx(expected, rel=0.03)
+
+
+@pytest.mark.parametrize("quantile", [50, 95, 99])
+def test_psquare_estimator_tracks_numpy_percentile(quantile):
+    """The streaming estimate should stay close to the exact percentile."""
+    rng = np.random.default_rng(0)
+    samples = rng.exponential(scale=100.0, size=5000)
+    estimator = PSquareEstimator(quantile)
+    for value in samples:
+        estimator.observe(float(value))
+
+    expected = np.percentile(samples, quantile, method="linear")
+    assert estimator.value() == pytest.approx(expected, rel=0.05)
+
+
+@pytest.mark.parametrize("quantile", [50, 95, 99])
+@pytest.mark.parametrize("extra", [1000.0, -5.0, 16.5])
+def test_psquare_markers_see_the_first_sample_after_seeding(quantile, extra):
+    estimator = PSquareEstimator(quantile)
+    values = [float(v) for v in range(1, PSquareEstimator.exact_limit + 1)] + [extra]
+    for value in values:
+        estimator.observe(value)
+
+    exact = sorted(values)
+    heights = estimator._heights
+    assert heights[0] == exact[0]
+    assert heights[4] == exact[-1]
+    assert heights == sorted(heights)
+    rank = int(estimator._positions[2]) - 1
+    assert exact[rank - 1] <= estimator.value() <= exact[rank + 1]
+
+
+def test_rolling_window_p99_sees_outlier_after_overflow():
+    digest = RollingWindowDigest(time_fn=FakeClock())
+    for _ in range(PSquareEstimator.exact_limit):
+        digest.add(1.0)
+    digest.add(5000.0)
+    for _ in range(5):
+        digest.add(1.0)
+
+    assert digest.percentile(99) > 1000.0
+
+
+def test_rolling_window_shares_exact_samples_until_overflow():
+    clock = FakeClock()
+    digest = RollingWindowDigest(time_fn=clock)
+    standalone = PSquareEstimator(95)
+    values = [float((i * 37) % 101) for i in range(200)]
+
+    for value in values[: PSquareEstimator.exact_limit]:
+        digest.add(value)
+        standalone.observe(value)
+    slot = next(i for i, start in enumerate(digest._starts) if start is not None)
+    assert digest._estimators[slot] is None
+    assert digest.percentile(95) == pytest.approx(standalone.value())
+
+    for value in values[PSquareEstimator.exact_limit:]:
+        digest.add(value)
+        standalone.observe(value)
+    assert len(digest._samples[slot]) == 0
+    assert digest.percentile(95) == pytest.approx(standalone.value())
+
+
+def test_rolling_window_reuses_slot_buffers_on_rollover():
+    clock = FakeClock(0.0)
+    digest = RollingWindowDigest(window_seconds=60, bucket_seconds=60, time_fn=clock)
+    for value in range(100):
+        digest.add(float(value))
+    estimators = digest._estimators[0]
+    samples = digest._samples[0]
+
+    # Two slots in the ring: t=120 lands back in slot 0 as a fresh bucket.
+    clock.t = 120.0
+    digest.add(7.0)
+    digest.add(9.0)
+    assert digest._samples[0] is samples
+    assert digest.percentile(50) == pytest.approx(8.0)
+
+    for value in range(100):
+        digest.add(float(value))
+    assert digest._estimators[0] is estimators
+    assert digest.count() == 102
+
+
+def test_psquare_estimator_is_exact_for_small_samples():
+    estimator = PSquareEstimator(95)
+    assert estimator.value() is None
+    for value in [5.0, 1.0, 3.0]:
+        estimator.observe(value)
+    assert estimator.value() == pytest.approx(np.percentile([5.0, 1.0, 3.0], 95))
 
 
 def test_record_request_enforces_max_endpoints():
@@ -123,3 +294,115 @@ def test_record_request_enforces_max_endpoints():
     stored_keys = metrics.request_counts.keys()
     assert "GET /new" in stored_keys
     assert "GET /old" not in stored_keys
+
+
+def test_endpoint_latency_stats_are_derived_on_read():
+    clock = FakeClock()
+    metrics = PulseMetrics(window_seconds=60, bucket_seconds=60, time_fn=clock)
+    for duration in (10.0, 20.0, 30.0):
+        metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=duration)
+
+    stats = metrics.get_metrics()["endpoint_metrics"]["GET /"]
+    assert stats["avg_response_time"] == pytest.approx(20.0)
+    assert stats["p95_response_time"] == pytest.approx(29.0)
+
+    # Once the window expires the last derived values are retained.
+    clock.t += 600
+    snapshot = metrics.get_metrics()
+    assert snapshot["summary"]["window_request_count"] == 0
+    assert snapshot["endpoint_metrics"]["GET /"]["avg_response_time"] == pytest.approx(20.0)
+
+
+def test_record_request_buffers_until_batch_size():
+    metrics = PulseMetrics(ingest_batch_size=3)
+    for _ in range(2):
+        metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=1.0)
+    assert len(metrics._pending) == 2
+    assert metrics._request_counts == {}
+
+    metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=1.0)
+    assert len(metrics._pending) == 0
+    assert metrics._request_counts["GET /"] == 3
+
+
+def test_public_counters_include_buffered_requests():
+    metrics = PulseMetrics()
+    metrics.record_request(endpoint="/", method="GET", status_code=404, duration_ms=10.0)
+    assert metrics.status_codes["GET /"] == {404: 1}
+    assert metrics.endpoint_metrics["GET /"]["error_count"] == 1
+    assert metrics.endpoint_metrics["GET /"]["avg_response_time"] == pytest.approx(10.0)
+
+
+def test_peek_p95_reads_last_batch_without_draining():
+    metrics = PulseMetrics(ingest_batch_size=4)
+    assert metrics.peek_p95_response_time("GET /") is None
+
+    for duration in (100.0, 200.0, 300.0, 400.0):
+        metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=duration)
+    # The full batch was drained and its endpoint's stats refreshed.
+    assert metrics.peek_p95_response_time("GET /") == pytest.approx(385.0)
+
+    metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=5000.0)
+    assert metrics.peek_p95_response_time("GET /") == pytest.approx(385.0)
+    assert len(metrics._pending) == 1
+
+
+def test_record_request_drains_after_max_delay():
+    """A quiet endpoint still gets fresh stats for the per-request SLA check."""
+    clock = FakeClock(0.0)
+    metrics = PulseMetrics(ingest_max_delay=1.0, time_fn=clock)
+    metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=10.0)
+    assert metrics.peek_p95_response_time("GET /") is None
+
+    clock.t = 1.0
+    metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=2000.0)
+    assert len(metrics._pending) == 0
+    assert metrics.peek_p95_response_time("GET /") == pytest.approx(1900.5)
+
+
+def test_error_counts_are_derived_from_status_classes():
+    metrics = PulseMetrics()
+    for status in (200, 302, 404, 503, 503):
+        metrics.record_request(endpoint="/x", method="GET", status_code=status, duration_ms=1.0)
+    metrics.record_request(endpoint="/ok", method="GET", status_code=204, duration_ms=1.0)
+
+    snapshot = metrics.get_metrics()
+    assert snapshot["error_counts"] == {"GET /x": 3}
+    assert snapshot["status_codes"]["GET /x"] == {200: 1, 302: 1, 404: 1, 503: 2}
+    assert snapshot["summary"]["total_errors"] == 3
+    assert metrics.error_counts == {"GET /x": 3}
+    assert metrics.error_counts["GET /ok"] == 0
+
+
+def test_get_metrics_reuses_snapshot_until_new_request():
+    metrics = PulseMetrics()
+    metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=1.0)
+    first = metrics.get_metrics()
+    assert metrics.get_metrics() is first
+
+    metrics.record_request(endpoint="/", method="GET", status_code=200, duration_ms=1.0)
+    second = metrics.get_metrics()
+    assert second is not first
+    assert second["request_counts"]["GET /"] == 2
+    assert first["endpoint_metrics"]["GET /"]["total_requests"] == 1
+
+
+@pytest.mark.parametrize("orjson_available", [True, False])
+def test_get_metrics_bytes_encodes_and_reuses_snapshot(monkeypatch, orjson_available):
+    monkeypatch.setattr("fastapi_pulse.serialization.ORJSON_AVAILABLE", orjson_available)
+    metrics = PulseMetrics()
+    metrics.record_request(endpoint="/", method="GET", status_code=404, duration_ms=3.0)
+
+    payload = metrics.get_metrics_bytes()
+    decoded = json.loads(payload)
+    assert decoded["status_codes"] == {"GET /": {"404": 1}}
+    assert decoded["summary"]["total_errors"] == 1
+    assert metrics.get_metrics_bytes() is payload
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [PulseMetrics, RollingWindowDigest, lambda: PSquareEstimator(95)],
+)
+def test_metrics_classes_use_slots(factory):
+    assert not hasattr(factory(), "__dict__")
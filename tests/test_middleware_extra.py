@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import time
+
 import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
-from fastapi_pulse.middleware import PulseMiddleware
+from fastapi_pulse.middleware import PulseMiddleware, _get_header, _ResponseTracker
 
 
 class StubMetrics:
@@ -14,8 +18,41 @@ class StubMetrics:
     def record_request(self, **kwargs):
         self.calls.append(kwargs)
 
-    def get_metrics(self):
-        return {"endpoint_metrics": {}}
+    def peek_p95_response_time(self, key):
+        return None
+
+
+async def _receive():
+    return {"type": "http.request"}
+
+
+async def _noop_send(message):
+    """ASGI ``send`` that drops every message."""
+    return None
+
+
+def _collector(messages):
+    """Return an ASGI ``send`` that appends each message to *messages*."""
+
+    async def send(message):
+        messages.append(message)
+
+    return send
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+@pytest.fixture(scope="module")
+def path_middleware():
+    """Shared middleware for tests that only exercise path helpers."""
+    return PulseMiddleware(
+        _ok_app,
+        metrics=StubMetrics(),
+        exclude_path_prefixes=("/health/pulse", "pulse/", "/"),
+    )
 
 
 @pytest.mark.asyncio
@@ -28,14 +65,7 @@ async def test_middleware_sends_empty_body_when_response_started():
     middleware = PulseMiddleware(FailingApp(), metrics=StubMetrics(), exclude_path_prefixes=())
     scope = {"type": "http", "method": "GET", "path": "/foo", "headers": []}
     messages = []
-
-    async def receive():
-        return {"type": "http.request"}
-
-    async def send(message):
-        messages.append(message)
-
-    await middleware(scope, receive, send)
+    await middleware(scope, _receive, _collector(messages))
     assert messages[-1]["type"] == "http.response.body"
     assert messages[-1]["body"] == b""
 
@@ -51,8 +81,8 @@ async def test_middleware_swallows_metric_and_logging_errors(monkeypatch):
         def record_request(self, **_):
             raise RuntimeError("metrics failed")
 
-        def get_metrics(self):
-            return {"endpoint_metrics": {}}
+        def peek_p95_response_time(self, key):
+            return None
 
     middleware = PulseMiddleware(SimpleApp(), metrics=BadMetrics(), exclude_path_prefixes=())
     def raise_alert(*args, **kwargs):
@@ -65,28 +95,200 @@ async def test_middleware_swallows_metric_and_logging_errors(monkeypatch):
     monkeypatch.setattr(PulseMiddleware, "_check_sla_violation", raise_sla, raising=False)
 
     scope = {"type": "http", "method": "GET", "path": "/err", "headers": []}
-
-    async def receive():
-        return {"type": "http.request"}
-
-    async def send(message):
-        return message
-
-    await middleware(scope, receive, send)
+    await middleware(scope, _receive, _noop_send)
 
 
 def test_check_sla_violation_logs_warning(caplog):
     class Metrics:
-        def get_metrics(self):
-            return {
-                "endpoint_metrics": {
-                    "GET /slow": {
-                        "p95_response_time": 500,
-                    }
-                }
-            }
+        def peek_p95_response_time(self, key):
+            return {"GET /slow": 500}.get(key)
 
     middleware = PulseMiddleware(lambda *args, **kwargs: None, metrics=Metrics(), exclude_path_prefixes=())
     caplog.set_level("WARNING")
     middleware._check_sla_violation("GET", "/slow", "cid")
     assert "SLA violation detected" in caplog.text
+
+
+def test_middleware_keys_metrics_by_route_template():
+    metrics = StubMetrics()
+    sub_app = FastAPI()
+
+    @sub_app.get("/orders/{order_id}")
+    def read_order(order_id: int):
+        return {"id": order_id}
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return {"id": item_id}
+
+    app.mount("/v1", sub_app)
+    app.add_middleware(PulseMiddleware, metrics=metrics)
+
+    with TestClient(app) as client:
+        client.get("/items/42")
+        client.get("/v1/orders/7")
+        client.get("/unknown/123")
+
+    assert [call["endpoint"] for call in metrics.calls] == [
+        "/items/{item_id}",
+        "/v1/orders/{order_id}",
+        "/unknown/{id}",
+    ]
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/users/123", "/users/{id}"),
+        ("/users/123/orders/456", "/users/{id}/orders/{id}"),
+        ("/items/550E8400-e29b-41d4-a716-446655440000", "/items/{id}"),
+        ("/items/550e8400-e29b-41d4-a716-446655440000/parts/7", "/items/{id}/parts/{id}"),
+        ("/api/v1/products", "/api/v1/products"),
+        ("/plain", "/plain"),
+    ],
+)
+def test_normalize_path_collapses_id_segments(path_middleware, path, expected):
+    assert path_middleware._normalize_path(path) == expected
+
+
+@pytest.mark.parametrize(
+    "path, skipped",
+    [
+        ("/health/pulse", True),
+        ("/health/pulse/probe", True),
+        ("/health/pulsed", False),
+        ("/pulse", True),
+        ("/pulse/index.html", True),
+        ("/", True),
+        ("/users", False),
+    ],
+)
+def test_should_skip_tracking_matches_prefix_boundaries(path_middleware, path, skipped):
+    assert path_middleware._should_skip_tracking(path) is skipped
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ([(b"accept", b"*/*"), (b"x-correlation-id", b"abc-123")], "abc-123"),
+        ([(b"accept", b"*/*")], "unknown"),
+    ],
+)
+async def test_middleware_reads_correlation_id_from_raw_headers(headers, expected):
+    metrics = StubMetrics()
+    middleware = PulseMiddleware(_ok_app, metrics=metrics)
+    scope = {"type": "http", "method": "GET", "path": "/ok", "headers": headers}
+    await middleware(scope, _receive, _noop_send)
+    assert metrics.calls[0]["correlation_id"] == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "headers",
+    [
+        None,
+        [(b"content-type", b"text/plain")],
+        ((b"content-type", b"text/plain"),),
+        [(b"x-response-time-ms", b"stale")],
+    ],
+)
+async def test_middleware_sets_single_response_time_header(headers):
+    class OkApp:
+        async def __call__(self, scope, receive, send):
+            start = {"type": "http.response.start", "status": 200}
+            if headers is not None:
+                start["headers"] = headers
+            await send(start)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    middleware = PulseMiddleware(OkApp(), metrics=StubMetrics())
+    scope = {"type": "http", "method": "GET", "path": "/ok", "headers": []}
+    messages = []
+    await middleware(scope, _receive, _collector(messages))
+    names = [name for name, _ in messages[0]["headers"]]
+    assert names.count(b"x-response-time-ms") == 1
+    assert float(_get_header(messages[0]["headers"], b"x-response-time-ms")) >= 0
+
+
+@pytest.mark.asyncio
+async def test_response_tracker_records_status_and_measures_once():
+    messages = []
+    tracker = _ResponseTracker(_collector(messages), time.perf_counter_ns())
+    assert not hasattr(tracker, "__dict__")
+
+    await tracker({"type": "http.response.start", "status": 201})
+    first = tracker.duration()
+    await tracker({"type": "http.response.body", "body": b"", "more_body": False})
+
+    assert tracker.response_started
+    assert tracker.status_code == 201
+    assert tracker.duration() == first
+    assert len(messages) == 2
+
+
+@pytest.mark.asyncio
+async def test_excluded_paths_bypass_the_response_tracker():
+    seen = []
+
+    class RecordingApp:
+        async def __call__(self, scope, receive, send):
+            seen.append(send)
+
+    metrics = StubMetrics()
+    middleware = PulseMiddleware(
+        RecordingApp(), metrics=metrics, exclude_path_prefixes=("/health",)
+    )
+    await middleware({"type": "http", "method": "GET", "path": "/health/pulse"}, _receive, _noop_send)
+    await middleware({"type": "http", "method": "GET", "path": "/items"}, _receive, _noop_send)
+
+    assert seen[0] is _noop_send
+    assert isinstance(seen[1], _ResponseTracker)
+    assert [call["endpoint"] for call in metrics.calls] == ["/items"]
+
+
+@pytest.mark.asyncio
+async def test_middleware_duration_uses_perf_counter_ns(monkeypatch):
+    ticks = iter([0, 15_000_000])  # 15ms apart, no real sleep needed
+    monkeypatch.setattr("fastapi_pulse.middleware.time.perf_counter_ns", lambda: next(ticks))
+
+    metrics = StubMetrics()
+    middleware = PulseMiddleware(_ok_app, metrics=metrics)
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": "/ok", "headers": []}
+    await middleware(scope, _receive, _collector(messages))
+
+    assert metrics.calls[0]["duration_ms"] == 15.0
+    assert _get_header(messages[0]["headers"], b"x-response-time-ms") == b"15.00"
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ([(b"a", b"1"), (b"x-correlation-id", b"abc"), (b"x-correlation-id", b"def")], b"abc"),
+        (((b"a", b"1"),), None),
+        ([], None),
+    ],
+)
+def test_get_header_returns_first_match(headers, expected):
+    assert _get_header(headers, b"x-correlation-id") == expected
+
+
+@pytest.mark.asyncio
+async def test_fallback_response_uses_prebuilt_json_body():
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    middleware = PulseMiddleware(failing_app, metrics=StubMetrics())
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": "/boom", "headers": []}
+    await middleware(scope, _receive, _collector(messages))
+
+    start, body = messages
+    assert start["status"] == 500
+    assert _get_header(start["headers"], b"content-type") == b"application/json"
+    assert _get_header(start["headers"], b"content-length") == str(len(body["body"])).encode()
+    assert _get_header(start["headers"], b"x-response-time-ms") is not None
+    assert body["body"] == b'{"detail":"Internal Server Error"}'
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import json
+import sys
+import threading
 from pathlib import Path
 
 import pytest
 
-from fastapi_pulse.payload_store import PulsePayloadStore
+from fastapi_pulse.payload_store import PulsePayloadStore, _flush_live_stores
 
 
 def test_load_handles_missing_and_corrupt_file(tmp_path: Path):
@@ -44,6 +47,31 @@ def test_set_rejects_when_storage_limit_exceeded(monkeypatch, tmp_path: Path):
         store.set("GET /foo", {"body": None})
 
 
+def test_storage_limit_counts_unflushed_writes(monkeypatch, tmp_path: Path):
+    store = PulsePayloadStore(tmp_path / "payloads.json", flush_interval=60)
+    entry_size = len(b'"GET /a0":') + len(
+        json.dumps(store._sanitize_payload({}), separators=(",", ":")).encode()
+    )
+    monkeypatch.setattr(
+        "fastapi_pulse.payload_store.MAX_TOTAL_STORAGE_BYTES", 2 + 3 * (entry_size + 1)
+    )
+
+    for index in range(3):
+        store.set(f"GET /a{index}", {})
+    # Nothing has been flushed yet, but the pending entries already fill the cap.
+    assert not (tmp_path / "payloads.json").exists()
+    with pytest.raises(ValueError, match="Storage limit exceeded"):
+        store.set("GET /a3", {})
+
+    # Rewriting an entry at the same size, or freeing space, is still allowed.
+    store.set("GET /a0", {})
+    store.delete("GET /a1")
+    store.set("GET /a3", {})
+
+    store.flush()
+    assert (tmp_path / "payloads.json").stat().st_size <= store._total_bytes
+
+
 def test_all_returns_copy(tmp_path: Path):
     store = PulsePayloadStore(tmp_path / "payloads.json")
     store.set("GET /foo", {"body": {"value": 1}})
@@ -52,3 +80,161 @@ def test_all_returns_copy(tmp_path: Path):
     snapshot["GET /bar"] = {"body": {"value": 1}}
     assert store.get("GET /foo")["body"]["value"] == 1
     assert store.get("GET /bar") is None
+
+
+def test_set_coalesces_writes_until_flush(monkeypatch, tmp_path: Path):
+    store_path = tmp_path / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=60)
+    writes = []
+    original_flush = store._flush
+
+    def counting_flush():
+        writes.append(1)
+        original_flush()
+
+    monkeypatch.setattr(store, "_flush", counting_flush)
+    for index in range(5):
+        store.set(f"GET /item{index}", {"body": index})
+    store.delete("GET /item0")
+    assert writes == []
+    assert not store_path.exists()
+
+    store.flush()
+    store.flush()
+    assert writes == [1]
+    assert set(PulsePayloadStore(store_path).all()) == {f"GET /item{i}" for i in range(1, 5)}
+
+
+def test_zero_flush_interval_writes_immediately(tmp_path: Path):
+    store_path = tmp_path / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=0)
+    store.set("GET /foo", {"body": 1})
+    assert PulsePayloadStore(store_path).get("GET /foo")["body"] == 1
+
+
+def test_pending_writes_flush_after_interval(tmp_path: Path):
+    store_path = tmp_path / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=0.01)
+    store.set("GET /foo", {"body": 1})
+    store._flush_timer.join(timeout=5)
+    assert PulsePayloadStore(store_path).get("GET /foo")["body"] == 1
+
+
+def test_exit_hook_flushes_live_stores(tmp_path: Path):
+    store_path = tmp_path / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=60)
+    store.set("GET /foo", {"body": 1})
+    _flush_live_stores()
+    assert PulsePayloadStore(store_path).get("GET /foo")["body"] == 1
+
+
+def test_writers_on_other_shards_do_not_block(tmp_path: Path):
+    store = PulsePayloadStore(tmp_path / "payloads.json", flush_interval=60)
+    held = store._lock_for("GET /held")
+    other = next(
+        f"GET /other{index}"
+        for index in range(100)
+        if store._lock_for(f"GET /other{index}") is not held
+    )
+
+    with held:
+        worker = threading.Thread(target=store.set, args=(other, {"body": 1}))
+        worker.start()
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+    assert store.get(other)["body"] == 1
+    store.delete(other)
+    assert store.all() == {}
+
+
+@pytest.mark.parametrize("orjson_available", [True, False])
+def test_flush_round_trips_with_either_encoder(monkeypatch, tmp_path: Path, orjson_available):
+    monkeypatch.setattr("fastapi_pulse.serialization.ORJSON_AVAILABLE", orjson_available)
+    store_path = tmp_path / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=0)
+    store.set("POST /items", {"body": {"name": "café", "big": 2**70 + 1}, "query": {"q": "1"}})
+
+    assert "café" in store_path.read_text(encoding="utf-8")
+    reloaded = PulsePayloadStore(store_path).get("POST /items")
+    assert reloaded["body"] == {"name": "café", "big": 2**70 + 1}
+    assert reloaded["query"] == {"q": "1"}
+
+
+@pytest.mark.parametrize(
+    "payload, expected",
+    [
+        (
+            {},
+            {"path_params": {}, "query": {}, "headers": {}, "body": None, "media_type": None},
+        ),
+        (
+            {"query": None, "headers": [], "body": None, "extra": "dropped"},
+            {"path_params": {}, "query": {}, "headers": {}, "body": None, "media_type": None},
+        ),
+        (
+            {"path_params": {"id": 1}, "body": 0, "media_type": "text/plain"},
+            {"path_params": {"id": 1}, "query": {}, "headers": {}, "body": 0, "media_type": "text/plain"},
+        ),
+    ],
+)
+def test_sanitize_payload_keeps_known_fields(payload, expected):
+    assert PulsePayloadStore._sanitize_payload(payload) == expected
+
+
+def test_flush_joins_cached_entry_fragments(monkeypatch, tmp_path: Path):
+    store_path = tmp_path / "payloads.json"
+    store_path.write_text('{"GET /a": {"body": 1}}', encoding="utf-8")
+    store = PulsePayloadStore(store_path, flush_interval=60)
+    store.set('GET /b', {"body": "quote \" and café"})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("flush must not re-encode entries")
+
+    monkeypatch.setattr("fastapi_pulse.payload_store.dumps", fail)
+    store.flush()
+    monkeypatch.undo()
+
+    assert json.loads(store_path.read_bytes()) == {
+        "GET /a": {"body": 1},
+        "GET /b": {"path_params": {}, "query": {}, "headers": {}, "body": "quote \" and café", "media_type": None},
+    }
+    store.delete("GET /a")
+    store.flush()
+    assert set(json.loads(store_path.read_bytes())) == {"GET /b"}
+
+
+@pytest.mark.parametrize("durable", [False, True])
+def test_flush_fsyncs_only_when_durable(monkeypatch, tmp_path: Path, durable):
+    synced = []
+    monkeypatch.setattr("fastapi_pulse.payload_store.os.fsync", synced.append)
+    store_path = tmp_path / "nested" / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=0, durable=durable)
+    store.set("GET /foo", {"body": 1})
+    store.set("GET /bar", {"body": 2})
+
+    assert len(synced) == (2 if durable else 0)
+    assert not store_path.with_suffix(".tmp").exists()
+    assert set(PulsePayloadStore(store_path).all()) == {"GET /foo", "GET /bar"}
+
+
+def test_endpoint_ids_are_interned(tmp_path: Path):
+    store_path = tmp_path / "payloads.json"
+    store = PulsePayloadStore(store_path, flush_interval=0)
+    store.set("".join(["GET ", "/foo"]), {"body": 1})
+
+    for source in (store, PulsePayloadStore(store_path)):
+        (key,) = source.all()
+        assert key is sys.intern("GET /foo")
+
+
+def test_deferred_flush_ignores_later_chdir(monkeypatch, tmp_path: Path):
+    (tmp_path / "first").mkdir()
+    (tmp_path / "second").mkdir()
+    monkeypatch.chdir(tmp_path / "first")
+    store = PulsePayloadStore(Path("payloads.json"), flush_interval=60)
+    store.set("GET /foo", {"body": 1})
+
+    monkeypatch.chdir(tmp_path / "second")
+    store.flush()
+    assert (tmp_path / "first" / "payloads.json").exists()
+    assert not (tmp_path / "second" / "payloads.json").exists()
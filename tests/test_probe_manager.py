@@ -3,12 +3,12 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 import json
+from types import SimpleNamespace
 
 import pytest
 
-from fastapi import FastAPI
-
 from fastapi_pulse.metrics import PulseMetrics
 from fastapi_pulse.probe import (
     EndpointInfo,
@@ -18,42 +18,73 @@ from fastapi_pulse.probe import (
 )
 
 
-def make_endpoint(path="/items", method="GET", **kwargs):
-    return EndpointInfo(
-        id=f"{method} {path}",
-        method=method,
-        path=path,
-        summary=None,
-        tags=[],
-        requires_input=kwargs.get("requires_input", False),
-        has_path_params=kwargs.get("has_path_params", False),
-        has_request_body=kwargs.get("has_request_body", False),
-        path_parameters=kwargs.get("path_parameters", []),
-        query_parameters=[],
-        header_parameters=[],
-        request_body_media_type=kwargs.get("request_body_media_type"),
-        request_body_schema=None,
+# Everything not overridden keeps EndpointInfo's defaults; the empty lists are
+# shared between derived endpoints, which is fine as no test mutates them.
+_ENDPOINT_PROTO = EndpointInfo(id="GET /items", method="GET", path="/items")
+
+
+def make_endpoint(path="/items", method="GET", **overrides):
+    return dataclasses.replace(
+        _ENDPOINT_PROTO, id=f"{method} {path}", method=method, path=path, **overrides
     )
 
 
+def make_job(endpoint):
+    """Return a job with a single queued result for *endpoint*."""
+    job = ProbeJob(job_id="job", total_targets=1)
+    job.results = {
+        endpoint.id: ProbeResult(
+            endpoint_id=endpoint.id, method=endpoint.method, path=endpoint.path, status="queued"
+        )
+    }
+    return job
+
+
+class _StubPayloadStore:
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        return value
+
+    def delete(self, key):
+        return None
+
+
+# The manager only keeps references to these and none of the tests mutate
+# them, so one instance of each is shared by every manager in this module.
+# No test sends real requests, so the app needs no FastAPI machinery.
+_APP = SimpleNamespace()
+_REGISTRY = SimpleNamespace(openapi_schema={})
+_PAYLOAD_STORE = _StubPayloadStore()
+
+
+class StubClient:
+    """Stands in for the httpx client passed to ``_probe_endpoint``."""
+
+    def __init__(self):
+        self.response = SimpleNamespace(status_code=200, text="")
+        self.error = None
+        self.calls = []
+
+    async def request(self, method, path, **kwargs):
+        self.calls.append((method, path, kwargs))
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+@pytest.fixture
+def stub_client():
+    return StubClient()
+
+
 def make_manager(**overrides):
-    app = FastAPI()
-    metrics = PulseMetrics()
-    registry = type("Registry", (), {"openapi_schema": {}})()
-    payload_store = type(
-        "Store",
-        (),
-        {
-            "get": lambda self, key: None,
-            "set": lambda self, key, value: value,
-            "delete": lambda self, key: None,
-        },
-    )()
     return PulseProbeManager(
-        app,
-        metrics,
-        registry=registry,
-        payload_store=payload_store,
+        _APP,
+        PulseMetrics(),
+        registry=_REGISTRY,
+        payload_store=_PAYLOAD_STORE,
         **overrides,
     )
 
@@ -171,88 +202,63 @@ def test_prepare_payload_respects_missing_path_params(monkeypatch):
 async def test_probe_endpoint_skips_when_payload_missing(monkeypatch):
     manager = make_manager()
     endpoint = make_endpoint()
-    job = ProbeJob(job_id="job")
-    job.results = {endpoint.id: ProbeResult(endpoint_id=endpoint.id, method=endpoint.method, path=endpoint.path, status="queued")}
+    job = make_job(endpoint)
 
     monkeypatch.setattr(manager, "_prepare_payload", lambda ep: None)
     await manager._probe_endpoint(job, None, endpoint)
     assert job.results[endpoint.id].status == "skipped"
 
 
-@pytest.mark.asyncio
-async def test_probe_endpoint_handles_non_json_body(monkeypatch):
-    manager = make_manager()
-    endpoint = make_endpoint(method="POST", path="/text")
-    job = ProbeJob(job_id="job")
-    job.results = {endpoint.id: ProbeResult(endpoint_id=endpoint.id, method=endpoint.method, path=endpoint.path, status="queued")}
-
-    payload = {
-        "path_params": {},
-        "query": {},
-        "headers": {},
-        "body": {"foo": "bar"},
-        "media_type": "text/plain",
-        "source": "custom",
-    }
-    monkeypatch.setattr(manager, "_prepare_payload", lambda ep: payload)
-
-    captured = {}
-
-    class StubResponse:
-        status_code = 200
-        text = ""
-
-    class StubClient:
-        async def request(self, method, path, **kwargs):
-            captured["data"] = kwargs["data"]
-            captured["content_type"] = kwargs["headers"]["content-type"]
-            return StubResponse()
-
-    await manager._probe_endpoint(job, StubClient(), endpoint)
-    assert json.loads(captured["data"]) == {"foo": "bar"}
-    assert captured["content_type"] == "text/plain"
+@pytest.mark.parametrize(
+    "path, params, expected",
+    [
+        ("/users/{user_id}/items/{item_id}", {"user_id": "123", "item_id": 456}, "/users/123/items/456"),
+        ("/test", {}, "/test"),
+        ("/test", None, "/test"),
+    ],
+)
+def test_format_path(path, params, expected):
+    assert PulseProbeManager._format_path(path, params) == expected
 
 
 @pytest.mark.asyncio
-async def test_probe_endpoint_handles_raw_body(monkeypatch):
+@pytest.mark.parametrize(
+    "body, expected_data",
+    [
+        ({"foo": "bar"}, '{"foo": "bar"}'),  # structured body, non-JSON media type
+        ("ping", "ping"),  # raw body passes through
+    ],
+)
+async def test_probe_endpoint_sends_non_json_bodies_as_data(monkeypatch, stub_client, body, expected_data):
     manager = make_manager()
-    endpoint = make_endpoint(method="POST", path="/raw")
-    job = ProbeJob(job_id="job")
-    job.results = {endpoint.id: ProbeResult(endpoint_id=endpoint.id, method=endpoint.method, path=endpoint.path, status="queued")}
+    endpoint = make_endpoint(method="POST", path="/text")
+    job = make_job(endpoint)
 
     payload = {
         "path_params": {},
         "query": {},
         "headers": {},
-        "body": "ping",
+        "body": body,
         "media_type": "text/plain",
         "source": "custom",
     }
     monkeypatch.setattr(manager, "_prepare_payload", lambda ep: payload)
 
-    captured = {}
-
-    class StubResponse:
-        status_code = 200
-        text = ""
-
-    class StubClient:
-        async def request(self, method, path, **kwargs):
-            captured["data"] = kwargs["data"]
-            captured["headers"] = kwargs["headers"]["content-type"]
-            return StubResponse()
-
-    await manager._probe_endpoint(job, StubClient(), endpoint)
-    assert captured["data"] == "ping"
-    assert captured["headers"] == "text/plain"
+    await manager._probe_endpoint(job, stub_client, endpoint)
+    (_, _, kwargs), = stub_client.calls
+    assert kwargs["data"] == expected_data
+    assert kwargs["headers"]["content-type"] == "text/plain"
 
 
 @pytest.mark.asyncio
-async def test_probe_endpoint_marks_warning_for_slow_success(monkeypatch):
+@pytest.mark.parametrize(
+    "elapsed, expected_status",
+    [(0.5, "healthy"), (1.0, "healthy"), (2.0, "warning")],
+)
+async def test_probe_endpoint_marks_warning_for_slow_success(monkeypatch, stub_client, elapsed, expected_status):
     manager = make_manager()
     endpoint = make_endpoint(path="/slow")
-    job = ProbeJob(job_id="job")
-    job.results = {endpoint.id: ProbeResult(endpoint_id=endpoint.id, method=endpoint.method, path=endpoint.path, status="queued")}
+    job = make_job(endpoint)
 
     monkeypatch.setattr(
         manager,
@@ -260,27 +266,20 @@ async def test_probe_endpoint_marks_warning_for_slow_success(monkeypatch):
         lambda ep: {"path_params": {}, "query": {}, "headers": {}, "body": None, "media_type": "application/json", "source": "generated"},
     )
 
-    times = iter([0.0, 2.0])
+    # Fake clock: no real waiting, latency is exactly ``elapsed`` seconds.
+    times = iter([0.0, elapsed])
     monkeypatch.setattr("fastapi_pulse.probe.time.perf_counter", lambda: next(times))
 
-    class StubResponse:
-        status_code = 200
-        text = ""
-
-    class StubClient:
-        async def request(self, *args, **kwargs):
-            return StubResponse()
-
-    await manager._probe_endpoint(job, StubClient(), endpoint)
-    assert job.results[endpoint.id].status == "warning"
+    await manager._probe_endpoint(job, stub_client, endpoint)
+    assert job.results[endpoint.id].status == expected_status
+    assert job.results[endpoint.id].latency_ms == pytest.approx(elapsed * 1000)
 
 
 @pytest.mark.asyncio
-async def test_probe_endpoint_handles_request_exception(monkeypatch):
+async def test_probe_endpoint_handles_request_exception(monkeypatch, stub_client):
     manager = make_manager()
     endpoint = make_endpoint(path="/boom")
-    job = ProbeJob(job_id="job")
-    job.results = {endpoint.id: ProbeResult(endpoint_id=endpoint.id, method=endpoint.method, path=endpoint.path, status="queued")}
+    job = make_job(endpoint)
 
     monkeypatch.setattr(
         manager,
@@ -288,11 +287,8 @@ async def test_probe_endpoint_handles_request_exception(monkeypatch):
         lambda ep: {"path_params": {}, "query": {}, "headers": {}, "body": None, "media_type": "application/json", "source": "generated"},
     )
 
-    class StubClient:
-        async def request(self, *args, **kwargs):
-            raise RuntimeError("boom")
-
-    await manager._probe_endpoint(job, StubClient(), endpoint)
+    stub_client.error = RuntimeError("boom")
+    await manager._probe_endpoint(job, stub_client, endpoint)
     assert job.results[endpoint.id].status == "critical"
     assert job.results[endpoint.id].error == "boom"
 
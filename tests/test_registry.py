@@ -2,9 +2,42 @@
 
 from __future__ import annotations
 
+import json
+from types import MappingProxyType
+
+import pytest
+
 from fastapi_pulse.registry import EndpointInfo, PulseEndpointRegistry
 
 
+# Small schemas as one JSON document: parsed once for the shared read-only
+# copies below, and re-parsed by fresh_schema() for tests that mutate.
+_SCHEMAS_JSON = """{
+  "empty": {"paths": {}},
+  "path_param": {"paths": {"/items/{item_id}": {"get": {
+    "parameters": [{"name": "item_id", "in": "path", "required": true}]}}}},
+  "request_body": {"paths": {"/items": {"post": {
+    "requestBody": {"content": {"application/json": {"schema": {"type": "object"}}}}}}}},
+  "required_query": {"paths": {"/search": {"get": {
+    "parameters": [{"name": "q", "in": "query", "required": true, "schema": {}}]}}}},
+  "defaulted_query": {"paths": {"/search": {"get": {
+    "parameters": [{"name": "q", "in": "query", "required": true, "schema": {"default": "x"}}]}}}}
+}"""
+# The proxies only block top-level assignment; nested dicts and lists stay
+# mutable (the parser requires real dicts), so use fresh_schema() to modify one.
+_SCHEMAS = {name: MappingProxyType(schema) for name, schema in json.loads(_SCHEMAS_JSON).items()}
+EMPTY_SCHEMA = _SCHEMAS["empty"]
+PATH_PARAM_SCHEMA = _SCHEMAS["path_param"]
+REQUEST_BODY_SCHEMA = _SCHEMAS["request_body"]
+REQUIRED_QUERY_SCHEMA = _SCHEMAS["required_query"]
+DEFAULTED_QUERY_SCHEMA = _SCHEMAS["defaulted_query"]
+
+
+def fresh_schema(name):
+    """Return a private, mutable copy of a named schema."""
+    return json.loads(_SCHEMAS_JSON)[name]
+
+
 class DummyApp:
     def __init__(self, schema):
         self._schema = schema
@@ -13,7 +46,36 @@ class DummyApp:
         return self._schema
 
 
-def build_schema():
+def make_registry(schema, **kwargs):
+    return PulseEndpointRegistry(DummyApp(schema), **kwargs)
+
+
+def list_endpoints(schema, **kwargs):
+    return make_registry(schema, **kwargs).list_endpoints()
+
+
+@pytest.fixture(scope="module")
+def registry_for():
+    """Return a registry per (schema, exclude_prefixes), parsed once per module.
+
+    Only for tests that treat the registry as read-only.
+    """
+    cache = {}
+
+    def make(schema, exclude_prefixes=()):
+        key = (id(schema), exclude_prefixes)
+        registry = cache.get(key)
+        if registry is None:
+            registry = cache[key] = make_registry(schema, exclude_prefixes=exclude_prefixes)
+            registry.refresh()
+        return registry
+
+    return make
+
+
+@pytest.fixture(scope="module")
+def mixed_schema():
+    """OpenAPI schema covering the parser's edge cases; shared read-only."""
     return {
         "paths": {
             "/health/pulse/private": {"get": {}},
@@ -48,10 +110,8 @@ def build_schema():
     }
 
 
-def test_registry_parses_various_operations():
-    schema = build_schema()
-    app = DummyApp(schema)
-    registry = PulseEndpointRegistry(app, exclude_prefixes=["/skip"])
+def test_registry_parses_various_operations(mixed_schema, registry_for):
+    registry = registry_for(mixed_schema, exclude_prefixes=("/skip",))
 
     endpoints = registry.list_endpoints()
     endpoint_ids = {endpoint.id for endpoint in endpoints}
@@ -71,3 +131,108 @@ def test_registry_parses_various_operations():
     # auto_probe_targets should exclude requires_input endpoints
     targets = registry.auto_probe_targets()
     assert all(not endpoint.requires_input for endpoint in targets)
+
+
+def test_registry_is_excluded_matches_on_segment_boundaries():
+    registry = make_registry(EMPTY_SCHEMA, exclude_prefixes=["skip/", "/"])
+
+    assert registry.is_excluded("/skip")
+    assert registry.is_excluded("/skip/me")
+    assert registry.is_excluded("/health/pulse/probe")
+    assert registry.is_excluded("/")
+    assert not registry.is_excluded("/skipper")
+    assert not registry.is_excluded("/health/pulsed")
+    assert not registry.is_excluded("/items")
+
+
+@pytest.mark.parametrize(
+    "schema, requires_input, has_path_params, has_request_body",
+    [
+        (PATH_PARAM_SCHEMA, True, True, False),
+        (REQUEST_BODY_SCHEMA, True, False, True),
+        (REQUIRED_QUERY_SCHEMA, True, False, False),
+        (DEFAULTED_QUERY_SCHEMA, False, False, False),
+    ],
+    ids=["path", "body", "query", "defaulted-query"],
+)
+def test_requires_input_detection(registry_for, schema, requires_input, has_path_params, has_request_body):
+    (endpoint,) = registry_for(schema).list_endpoints()
+    assert endpoint.requires_input is requires_input
+    assert endpoint.has_path_params is has_path_params
+    assert endpoint.has_request_body is has_request_body
+
+
+def test_parameters_are_split_by_location_in_declaration_order():
+    schema = {
+        "paths": {
+            "/items/{item_id}": {
+                "parameters": [
+                    {"name": "item_id", "in": "path", "required": True},
+                    {"name": "trace", "in": "header"},
+                ],
+                "get": {
+                    "parameters": [
+                        {"name": "q", "in": "query"},
+                        {"name": "session", "in": "cookie"},
+                        {"name": "page", "in": "query"},
+                    ]
+                },
+            }
+        }
+    }
+    (endpoint,) = list_endpoints(schema)
+
+    assert [p["name"] for p in endpoint.path_parameters] == ["item_id"]
+    assert [p["name"] for p in endpoint.query_parameters] == ["q", "page"]
+    assert [p["name"] for p in endpoint.header_parameters] == ["trace"]
+
+
+def test_endpoints_sorted_by_path_and_method():
+    schema = {
+        "paths": {
+            "/b": {"post": {}, "get": {}},
+            "/a": {"put": {}, "delete": {}},
+            "/a/b": {"get": {}},
+        }
+    }
+    endpoints = list_endpoints(schema)
+
+    assert [e.id for e in endpoints] == ["DELETE /a", "PUT /a", "GET /a/b", "GET /b", "POST /b"]
+    for current, following in zip(endpoints, endpoints[1:]):
+        assert (current.path, current.method) <= (following.path, following.method)
+
+
+def test_unchanged_schema_is_parsed_once():
+    schema = fresh_schema("request_body")
+    registry = make_registry(schema)
+
+    registry.list_endpoints()
+    cached = registry._endpoints
+    registry.auto_probe_targets()
+    registry.get_endpoint_map()
+    assert registry._parse_calls == 1
+    assert registry._endpoints is cached
+    assert registry.list_endpoints() is not cached
+
+    schema["paths"]["/other"] = {"get": {}}
+    assert len(registry.list_endpoints()) == 2
+    assert registry._parse_calls == 2
+
+
+@pytest.mark.parametrize(
+    "schema, expected_ids",
+    [
+        (None, []),
+        ({}, []),
+        ({"paths": "not a dict"}, []),
+        ({"paths": {"/t": None}}, []),
+        ({"paths": {"/t": {"get": {}}}}, ["GET /t"]),
+        ({"paths": {"/t": {"parameters": None, "get": {"parameters": None}}}}, ["GET /t"]),
+        ({"paths": {"/t": {"get": {"parameters": ["bad", {"name": "q", "in": "query", "required": True, "schema": None}]}}}}, ["GET /t"]),
+        ({"paths": {"/t": {"post": {"requestBody": {"content": {"application/json": None}}}}}}, ["POST /t"]),
+    ],
+    ids=["none", "empty", "paths-not-dict", "none-operations", "no-responses", "null-parameters", "bad-parameters", "null-media"],
+)
+def test_registry_tolerates_malformed_schemas(schema, expected_ids):
+    endpoints = list_endpoints(schema)
+    assert [endpoint.id for endpoint in endpoints] == expected_ids
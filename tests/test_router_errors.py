@@ -1,51 +1,31 @@
 """Tests for router error handling paths to improve coverage."""
 
+from __future__ import annotations
+
+import re
+from types import SimpleNamespace
+
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from fastapi_pulse.registry import PulseEndpointRegistry
-
-def test_get_registry_raises_when_not_initialized():
-    """Test that _get_registry raises RuntimeError when not initialized."""
-    from fastapi_pulse.router import create_pulse_router
-    from fastapi_pulse.metrics import PulseMetrics
-
-    app = FastAPI()
-    metrics = PulseMetrics()
-    router = create_pulse_router(metrics)
-    app.include_router(router)
-
-    # Don't initialize pulse - this will cause RuntimeError
-    # when trying to access registry
-    client = TestClient(app, raise_server_exceptions=False)
-
-    # This should raise RuntimeError about registry not initialized
-    # The error will be wrapped in HTTP 500
-    response = client.get("/health/pulse/endpoints")
-    assert response.status_code == 500
+from fastapi_pulse.router import _get_payload_store, _get_probe_manager, _get_registry
 
+NOT_INIT_RE = re.compile("not initialized")
 
-def test_get_probe_manager_raises_when_not_initialized():
-    """Test that _get_probe_manager raises RuntimeError when not initialized."""
-    from fastapi_pulse.router import create_pulse_router
-    from fastapi_pulse.metrics import PulseMetrics
 
-    app = FastAPI()
-    metrics = PulseMetrics()
-    router = create_pulse_router(metrics)
-    app.include_router(router)
-    app.state.fastapi_pulse_endpoint_registry = PulseEndpointRegistry(app, exclude_prefixes=())
-
-    client = TestClient(app, raise_server_exceptions=False)
-
-    # Probe endpoint should fail without probe manager
-    response = client.post("/health/pulse/probe")
-    assert response.status_code == 500
+@pytest.mark.parametrize(
+    "getter", [_get_registry, _get_probe_manager, _get_payload_store]
+)
+def test_getter_raises_when_not_initialized(getter):
+    """Each state getter should raise RuntimeError when add_pulse() was skipped."""
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+    with pytest.raises(RuntimeError, match=NOT_INIT_RE):
+        getter(request)
 
 
-def test_get_payload_store_raises_when_not_initialized():
-    """Test that _get_payload_store raises RuntimeError when not initialized."""
+def test_routes_return_500_when_not_initialized():
+    """A router mounted without add_pulse() should surface the error as HTTP 500."""
     from fastapi_pulse.router import create_pulse_router
     from fastapi_pulse.metrics import PulseMetrics
 
@@ -53,10 +33,8 @@ def test_get_payload_store_raises_when_not_initialized():
     metrics = PulseMetrics()
     router = create_pulse_router(metrics)
     app.include_router(router)
-    app.state.fastapi_pulse_endpoint_registry = PulseEndpointRegistry(app, exclude_prefixes=())
 
     client = TestClient(app, raise_server_exceptions=False)
 
-    # Payload endpoints should fail without payload store
-    response = client.put("/health/pulse/probe/GET%20%2Ftest/payload", json={})
+    response = client.get("/health/pulse/endpoints")
     assert response.status_code == 500
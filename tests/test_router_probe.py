@@ -7,6 +7,16 @@ from urllib.parse import quote
 
 from fastapi_pulse import add_pulse
 
+_ENCODED: dict[str, str] = {}
+
+
+def encoded(endpoint_id: str) -> str:
+    """Return the URL-quoted form of *endpoint_id*, computed once per id."""
+    value = _ENCODED.get(endpoint_id)
+    if value is None:
+        value = _ENCODED[endpoint_id] = quote(endpoint_id, safe='')
+    return value
+
 
 @pytest.fixture(name="client")
 def client_fixture():
@@ -34,9 +44,8 @@ def test_probe_start_without_body_returns_job_id(client: TestClient):
     response = client.post("/health/pulse/probe")
     assert response.status_code == 200
     data = response.json()
-    assert "job_id" in data
+    assert {"job_id", "total"} <= data.keys()
     assert isinstance(data["job_id"], str)
-    assert "total" in data
     assert isinstance(data["total"], int)
 
 
@@ -56,9 +65,8 @@ def test_probe_start_with_endpoints_returns_job_id(client: TestClient):
         )
         assert response.status_code == 200
         data = response.json()
-        assert "job_id" in data
+        assert {"job_id", "total"} <= data.keys()
         assert isinstance(data["job_id"], str)
-        assert "total" in data
         assert data["total"] >= 1
 
 
@@ -109,7 +117,7 @@ def test_save_custom_payload(client: TestClient):
 
     if post_endpoint:
         endpoint_id = post_endpoint["id"]
-        encoded_id = quote(endpoint_id, safe='')
+        encoded_id = encoded(endpoint_id)
 
         custom_payload = {
             "path_params": {},
@@ -132,7 +140,7 @@ def test_save_custom_payload(client: TestClient):
 def test_save_payload_invalid_endpoint_returns_404(client: TestClient):
     """PUT /pulse/probe/{endpoint_id}/payload with invalid endpoint should return 404."""
     endpoint_id = "GET /nonexistent/endpoint"
-    encoded_id = quote(endpoint_id, safe='')
+    encoded_id = encoded(endpoint_id)
 
     response = client.put(
         f"/health/pulse/probe/{encoded_id}/payload",
@@ -157,7 +165,7 @@ def test_delete_custom_payload(client: TestClient):
 
     if post_endpoint:
         endpoint_id = post_endpoint["id"]
-        encoded_id = quote(endpoint_id, safe='')
+        encoded_id = encoded(endpoint_id)
 
         # First save a custom payload
         custom_payload = {
@@ -184,7 +192,7 @@ def test_delete_custom_payload(client: TestClient):
 def test_delete_payload_invalid_endpoint_returns_404(client: TestClient):
     """DELETE /pulse/probe/{endpoint_id}/payload with invalid endpoint should return 404."""
     endpoint_id = "GET /nonexistent/endpoint"
-    encoded_id = quote(endpoint_id, safe='')
+    encoded_id = encoded(endpoint_id)
 
     response = client.delete(f"/health/pulse/probe/{encoded_id}/payload")
     assert response.status_code == 404
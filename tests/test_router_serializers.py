@@ -0,0 +1,148 @@
+"""Unit tests for the router's response serializers."""
+
+import copy
+
+import pytest
+
+from fastapi_pulse.probe import ProbeResult
+from fastapi_pulse.registry import EndpointInfo
+from fastapi_pulse.router import _iso_from_ts, _serialize_endpoint, _serialize_probe_result
+
+# Read-only serializer inputs; a serializer that mutated them would break later tests.
+_METRICS_FULL = {
+    "GET /api": {
+        "total_requests": 100,
+        "success_count": 95,
+        "error_count": 5,
+        "avg_response_time": 125.5,
+        "p95_response_time": 200.0,
+    }
+}
+_METRICS_RATE = {"GET /test": {"total_requests": 4, "success_count": 3, "error_count": 1}}
+_METRICS_ZERO = {"GET /new": {"total_requests": 0, "error_count": 0}}
+
+
+@pytest.fixture(scope="module")
+def healthy_probe():
+    """A successful probe result; serializers only read from it."""
+    return ProbeResult(
+        endpoint_id="GET /test",
+        method="GET",
+        path="/test",
+        status="healthy",
+        status_code=200,
+        latency_ms=50.5,
+        checked_at=1234567890.0,
+        payload={"test": "data"},
+    )
+
+
+@pytest.fixture(scope="module")
+def error_probe():
+    """A failed probe result that was never timestamped."""
+    return ProbeResult(
+        endpoint_id="GET /test",
+        method="GET",
+        path="/test",
+        status="critical",
+        error="Connection refused",
+    )
+
+
+def test_serialize_probe_result_without_result():
+    data = _serialize_probe_result(None)
+    assert data["status"] == "unknown"
+    assert data["checked_at_iso"] is None
+
+
+def test_serialize_probe_result_with_valid_result(healthy_probe):
+    data = _serialize_probe_result(healthy_probe)
+    assert data["status"] == "healthy"
+    assert data["status_code"] == 200
+    assert data["latency_ms"] == 50.5
+    assert data["payload"] == {"test": "data"}
+
+
+def test_serialize_probe_result_formats_iso_time(healthy_probe):
+    data = _serialize_probe_result(healthy_probe)
+    assert data["checked_at"] == 1234567890.0
+    assert data["checked_at_iso"] == "2009-02-13T23:31:30+00:00"
+
+
+def test_iso_timestamps_are_cached(healthy_probe):
+    first = _serialize_probe_result(healthy_probe)["checked_at_iso"]
+    second = _serialize_probe_result(healthy_probe)["checked_at_iso"]
+    assert first is second
+    assert _iso_from_ts(1609459200.0) == "2021-01-01T00:00:00+00:00"
+
+
+def test_serialize_probe_result_with_error(error_probe):
+    data = _serialize_probe_result(error_probe)
+    assert data["status"] == "critical"
+    assert data["error"] == "Connection refused"
+    assert data["checked_at"] is None
+    assert data["checked_at_iso"] is None
+
+
+def test_serialize_probe_result_does_not_mutate_input(healthy_probe):
+    """Sharing the module-scoped fixtures relies on this."""
+    before = copy.deepcopy(healthy_probe)
+    _serialize_probe_result(healthy_probe)
+    assert healthy_probe == before
+
+
+def test_serialize_endpoint_without_metrics_shares_defaults():
+    first = _serialize_endpoint(EndpointInfo(id="GET /a"), None, None, {})
+    second = _serialize_endpoint(EndpointInfo(id="GET /b"), {}, None, {})
+    assert first["metrics"] is second["metrics"]
+    assert first["metrics"]["total_requests"] == 0
+    assert first["metrics"]["error_rate"] == 0
+    assert first["metrics"]["avg_response_time"] is None
+
+
+@pytest.mark.parametrize(
+    "endpoint_id, metrics, probe, payload_info, checks",
+    [
+        pytest.param(
+            "GET /api", {}, None, {},
+            [("id", "GET /api"), ("method", "GET"), ("metrics.total_requests", 0),
+             ("metrics.error_rate", 0), ("last_probe.status", "unknown")],
+            id="defaults",
+        ),
+        pytest.param(
+            "GET /api", _METRICS_FULL, None, {},
+            [("metrics.total_requests", 100), ("metrics.success_count", 95),
+             ("metrics.avg_response_time", 125.5), ("metrics.p95_response_time", 200.0),
+             ("metrics.error_rate", 5.0)],
+            id="metrics",
+        ),
+        pytest.param(
+            "GET /test", _METRICS_RATE, "healthy_probe", {},
+            [("metrics.error_rate", 25.0), ("last_probe.status", "healthy"),
+             ("last_probe.status_code", 200)],
+            id="probe-result",
+        ),
+        pytest.param(
+            "GET /new", _METRICS_ZERO, None, {},
+            [("metrics.total_requests", 0), ("metrics.error_rate", 0)],
+            id="zero-requests",
+        ),
+        pytest.param(
+            "GET /api", {}, None, {"source": "custom", "effective": {"query": {"test": "value"}}},
+            [("payload.source", "custom"), ("payload.effective.query", {"test": "value"})],
+            id="payload-info",
+        ),
+    ],
+)
+def test_serialize_endpoint(request, endpoint_id, metrics, probe, payload_info, checks):
+    method, path = endpoint_id.split(" ", 1)
+    endpoint = EndpointInfo(id=endpoint_id, method=method, path=path)
+    probe_result = request.getfixturevalue(probe) if probe else None
+
+    data = _serialize_endpoint(endpoint, metrics.get(endpoint_id), probe_result, payload_info)
+
+    for dotted, expected in checks:
+        node = data
+        for part in dotted.split("."):
+            node = node[part]
+        assert node == expected, dotted
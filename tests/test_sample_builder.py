@@ -1,115 +1,99 @@
 """Unit tests for SamplePayloadBuilder to improve coverage."""
 
+from __future__ import annotations
+
+import dataclasses
 import datetime
+from types import SimpleNamespace
+
 import pytest
 from fastapi_pulse.sample_builder import SamplePayloadBuilder
 from fastapi_pulse.registry import EndpointInfo
 
 
-def test_build_with_path_parameters():
-    """Test building payload with path parameters."""
-    schema = {
-        "openapi": "3.0.0",
-        "paths": {}
-    }
-    builder = SamplePayloadBuilder(schema)
+class _FrozenDatetime(datetime.datetime):
+    @classmethod
+    def utcnow(cls):
+        return cls(2021, 1, 1)
+
+
+class _FrozenDate(datetime.date):
+    @classmethod
+    def today(cls):
+        return cls(2021, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def _freeze_time(monkeypatch):
+    """Pin the clock the builder reads so date formats compare exactly."""
+    monkeypatch.setattr(
+        "fastapi_pulse.sample_builder._dt",
+        SimpleNamespace(datetime=_FrozenDatetime, date=_FrozenDate),
+    )
+
+
+@pytest.fixture(scope="module")
+def builder(sample_openapi_schema):
+    """Share one read-only builder across the module."""
+    instance = SamplePayloadBuilder(sample_openapi_schema)
+    yield instance
+    # Tests only read from the builder; make sure none of them mutated it.
+    assert instance.openapi_schema is sample_openapi_schema
+    assert instance.components == {"schemas": {}}
+
+
+_ENDPOINT_PROTO = EndpointInfo(id="GET /", method="GET", path="/")
 
-    endpoint = EndpointInfo(
-        id="GET /users/{id}",
-        method="GET",
-        path="/users/{id}",
-        summary="Get user",
-        tags=[],
-        requires_input=False,
+
+def make_endpoint(path, method="GET", **overrides):
+    return dataclasses.replace(
+        _ENDPOINT_PROTO, id=f"{method} {path}", method=method, path=path, **overrides
+    )
+
+
+def test_build_with_path_parameters(builder):
+    """Test building payload with path parameters."""
+    endpoint = make_endpoint(
+        "/users/{id}",
         has_path_params=True,
-        has_request_body=False,
         path_parameters=[{"name": "id", "schema": {"type": "integer"}}],
-        query_parameters=[],
-        header_parameters=[],
-        request_body_schema=None,
-        request_body_media_type=None
     )
 
     payload = builder.build(endpoint)
-    assert "path_params" in payload
-    assert payload["path_params"]["id"] == 1
+    assert payload["path_params"] == {"id": 1}
 
 
-def test_build_with_query_parameters():
+def test_build_with_query_parameters(builder):
     """Test building payload with query parameters."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    endpoint = EndpointInfo(
-        id="GET /search",
-        method="GET",
-        path="/search",
-        summary="Search",
-        tags=[],
-        requires_input=False,
-        has_path_params=False,
-        has_request_body=False,
-        path_parameters=[],
+    endpoint = make_endpoint(
+        "/search",
         query_parameters=[
             {"name": "q", "schema": {"type": "string"}},
             {"name": "limit", "schema": {"type": "integer"}}
         ],
-        header_parameters=[],
-        request_body_schema=None,
-        request_body_media_type=None
     )
 
     payload = builder.build(endpoint)
-    assert "query" in payload
-    assert payload["query"]["q"] == "sample"
-    assert payload["query"]["limit"] == 1
+    assert payload["query"] == {"q": "sample", "limit": 1}
 
 
-def test_build_with_headers():
+def test_build_with_headers(builder):
     """Test building payload with headers."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    endpoint = EndpointInfo(
-        id="GET /api/data",
-        method="GET",
-        path="/api/data",
-        summary="Get data",
-        tags=[],
-        requires_input=False,
-        has_path_params=False,
-        has_request_body=False,
-        path_parameters=[],
-        query_parameters=[],
-        header_parameters=[
-            {"name": "X-API-Key", "schema": {"type": "string"}}
-        ],
-        request_body_schema=None,
-        request_body_media_type=None
+    endpoint = make_endpoint(
+        "/api/data",
+        header_parameters=[{"name": "X-API-Key", "schema": {"type": "string"}}],
     )
 
     payload = builder.build(endpoint)
-    assert "headers" in payload
-    assert payload["headers"]["X-API-Key"] == "sample"
+    assert payload["headers"] == {"X-API-Key": "sample"}
 
 
-def test_build_with_request_body():
+def test_build_with_request_body(builder):
     """Test building payload with request body."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    endpoint = EndpointInfo(
-        id="POST /users",
+    endpoint = make_endpoint(
+        "/users",
         method="POST",
-        path="/users",
-        summary="Create user",
-        tags=[],
-        requires_input=False,
-        has_path_params=False,
         has_request_body=True,
-        path_parameters=[],
-        query_parameters=[],
-        header_parameters=[],
         request_body_schema={
             "type": "object",
             "properties": {
@@ -117,21 +101,17 @@ def test_build_with_request_body():
                 "age": {"type": "integer"}
             }
         },
-        request_body_media_type="application/json"
+        request_body_media_type="application/json",
     )
 
     payload = builder.build(endpoint)
-    assert payload["body"] is not None
-    assert payload["body"]["name"] == "sample"
-    assert payload["body"]["age"] == 1
+    assert {"path_params", "query", "headers", "body", "media_type"} <= payload.keys()
+    assert payload["body"] == {"name": "sample", "age": 1}
     assert payload["media_type"] == "application/json"
 
 
-def test_value_for_parameter_with_example():
+def test_value_for_parameter_with_example(builder):
     """Test _value_for_parameter uses example if provided."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     param = {
         "name": "id",
         "example": 42,
@@ -142,11 +122,8 @@ def test_value_for_parameter_with_example():
     assert value == 42
 
 
-def test_value_for_parameter_with_content():
+def test_value_for_parameter_with_content(builder):
     """Test _value_for_parameter handles content parameter."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     param = {
         "name": "data",
         "content": {
@@ -181,58 +158,70 @@ def test_resolve_ref_valid():
     assert "name" in resolved["properties"]
 
 
-def test_resolve_ref_invalid():
-    """Test _resolve_ref handles invalid $ref."""
-    schema = {}
+def test_resolve_ref_caches_lookups():
+    """Repeated refs, valid or not, are walked only once per builder."""
+    schema = {"components": {"schemas": {"User": {"type": "string"}}}}
     builder = SamplePayloadBuilder(schema)
 
+    first = builder._resolve_ref("#/components/schemas/User")
+    assert builder._resolve_ref("#/components/schemas/User") is first
+    assert first is schema["components"]["schemas"]["User"]
+    assert builder._resolve_ref("invalid_format") == {}
+    assert builder._ref_cache == {
+        "#/components/schemas/User": first,
+        "invalid_format": {},
+    }
+
+
+def test_resolve_ref_invalid(builder):
+    """Test _resolve_ref handles invalid $ref."""
     resolved = builder._resolve_ref("#/components/schemas/NonExistent")
     assert resolved == {}
 
 
-def test_resolve_ref_empty():
+def test_resolve_ref_empty(builder):
     """Test _resolve_ref handles empty ref."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     resolved = builder._resolve_ref("")
     assert resolved == {}
 
 
-def test_value_from_schema_prefers_default_over_generated():
-    """_value_from_schema should return the provided default."""
-    builder = SamplePayloadBuilder({})
-    result = builder._value_from_schema({"type": "integer", "default": 99})
-    assert result == 99
-
-
-@pytest.mark.parametrize(
-    "fmt, assertion",
-    [
-        ("date-time", lambda v: v.endswith("Z") and "T" in v),
-        ("date", lambda v: len(v.split("-")) == 3),
-        ("email", lambda v: v == "user@example.com"),
-        ("uuid", lambda v: v == "00000000-0000-0000-0000-000000000000"),
-    ],
-)
-def test_value_from_schema_handles_string_formats(fmt, assertion):
-    """String schemas should respect known formats."""
-    builder = SamplePayloadBuilder({})
-    value = builder._value_from_schema({"type": "string", "format": fmt})
-    assert assertion(value)
-
-
-def test_value_from_schema_handles_numeric_and_boolean_types():
-    """Numeric and boolean schemas should map to sample primitives."""
-    builder = SamplePayloadBuilder({})
-    assert builder._value_from_schema({"type": "integer"}) == 1
-    assert builder._value_from_schema({"type": "number"}) == pytest.approx(1.0)
-    assert builder._value_from_schema({"type": "boolean"}) is True
-
-
-def test_value_from_schema_handles_arrays_and_objects():
+_VALUE_CASES = [
+    pytest.param({"type": "string"}, "sample", id="string"),
+    pytest.param({"type": "string", "format": "date-time"}, "2021-01-01T00:00:00Z", id="date-time"),
+    pytest.param({"type": "string", "format": "date"}, "2021-01-01", id="date"),
+    pytest.param({"type": "string", "format": "email"}, "user@example.com", id="email"),
+    pytest.param(
+        {"type": "string", "format": "uuid"},
+        "00000000-0000-0000-0000-000000000000",
+        id="uuid",
+    ),
+    pytest.param({"type": "integer"}, 1, id="integer"),
+    pytest.param({"type": "number"}, 1.0, id="number"),
+    pytest.param({"type": "boolean"}, True, id="boolean"),
+    pytest.param({"type": "mystery"}, "sample", id="unknown-type"),
+    pytest.param({"type": "integer", "default": 99}, 99, id="integer-default"),
+    pytest.param({"type": "string", "default": "default_value"}, "default_value", id="string-default"),
+    pytest.param({"type": "string", "example": "example_value"}, "example_value", id="example"),
+    pytest.param({"example": {"foo": "bar"}}, {"foo": "bar"}, id="untyped-example"),
+    pytest.param({"type": "string", "enum": ["option1", "option2"]}, "option1", id="enum"),
+    pytest.param({"anyOf": [{"type": "string"}, {"type": "integer"}]}, "sample", id="anyOf"),
+    pytest.param({"anyOf": [{"type": "number"}]}, 1.0, id="anyOf-number"),
+    pytest.param({"oneOf": [{"type": "integer"}, {"type": "string"}]}, 1, id="oneOf"),
+    pytest.param({"oneOf": [{"type": "boolean"}]}, True, id="oneOf-boolean"),
+]
+
+
+@pytest.mark.parametrize("schema, expected", _VALUE_CASES)
+def test_value_from_schema_cases(builder, schema, expected):
+    """Scalar schemas, defaults, examples, enums and unions map to fixed samples."""
+    value = builder._value_from_schema(schema)
+    # bool is a subclass of int, so compare exact types rather than isinstance.
+    assert value == expected and type(value) is type(expected)
+    assert isinstance(value, bool) == isinstance(expected, bool)
+
+
+def test_value_from_schema_handles_arrays_and_objects(builder):
     """Arrays and objects should recurse into nested schemas."""
-    builder = SamplePayloadBuilder({})
     array_schema = {"type": "array", "items": {"type": "integer"}}
     object_schema = {
         "type": "object",
@@ -247,25 +236,14 @@ def test_value_from_schema_handles_arrays_and_objects():
     assert payload["profile"]["age"] == 1
 
 
-def test_value_from_schema_handles_additional_properties_only():
+def test_value_from_schema_handles_additional_properties_only(builder):
     """Objects with only additionalProperties should still produce a dict."""
-    builder = SamplePayloadBuilder({})
     schema = {"type": "object", "additionalProperties": {"type": "boolean"}}
     assert builder._value_from_schema(schema)["key"] is True
 
 
-def test_value_from_schema_handles_anyof_and_oneof():
-    """Union-like schemas should evaluate the first option."""
-    builder = SamplePayloadBuilder({})
-    anyof_value = builder._value_from_schema({"anyOf": [{"type": "number"}]})
-    oneof_value = builder._value_from_schema({"oneOf": [{"type": "boolean"}]})
-    assert anyof_value == pytest.approx(1.0)
-    assert oneof_value is True
-
-
-def test_value_from_schema_handles_enum_and_depth_limits():
+def test_value_from_schema_handles_enum_and_depth_limits(builder):
     """Ensure enums return the first entry and depth guard works."""
-    builder = SamplePayloadBuilder({})
     assert builder._value_from_schema({"enum": ["first", "second"]}) == "first"
     assert builder._value_from_schema({"type": "string"}, depth=9) == "sample"
 
@@ -278,18 +256,6 @@ def test_resolve_ref_handles_non_dict_node():
     assert resolved == {}
 
 
-def test_value_from_schema_prefers_example_without_default():
-    """Ensure example values are used when provided."""
-    builder = SamplePayloadBuilder({})
-    assert builder._value_from_schema({"example": {"foo": "bar"}}) == {"foo": "bar"}
-
-
-def test_value_from_schema_returns_sample_for_unknown_type():
-    """Schemas with unknown types should fall back to 'sample'."""
-    builder = SamplePayloadBuilder({})
-    assert builder._value_from_schema({"type": "mystery"}) == "sample"
-
-
 def test_value_from_schema_with_ref():
     """Test _value_from_schema resolves $ref."""
     schema = {
@@ -307,87 +273,19 @@ def test_value_from_schema_with_ref():
     assert value == "sample"
 
 
-def test_value_from_schema_with_default():
-    """Test _value_from_schema uses default value."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    value = builder._value_from_schema({"type": "string", "default": "default_value"})
-    assert value == "default_value"
-
-
-def test_value_from_schema_with_enum():
-    """Test _value_from_schema uses first enum value."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    value = builder._value_from_schema({"type": "string", "enum": ["option1", "option2"]})
-    assert value == "option1"
-
-
-def test_value_from_schema_string_formats():
-    """Test _value_from_schema handles string formats."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    # date-time format
-    value = builder._value_from_schema({"type": "string", "format": "date-time"})
-    assert "Z" in value
-
-    # date format
-    value = builder._value_from_schema({"type": "string", "format": "date"})
-    assert "-" in value
-
-    # email format
-    value = builder._value_from_schema({"type": "string", "format": "email"})
-    assert "@" in value
-
-    # uuid format
-    value = builder._value_from_schema({"type": "string", "format": "uuid"})
-    assert value == "00000000-0000-0000-0000-000000000000"
-
-    # default string
-    value = builder._value_from_schema({"type": "string"})
-    assert value == "sample"
-
-
-def test_value_from_schema_primitive_types():
-    """Test _value_from_schema handles primitive types."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    # integer
-    value = builder._value_from_schema({"type": "integer"})
-    assert value == 1
-
-    # number
-    value = builder._value_from_schema({"type": "number"})
-    assert value == 1.0
-
-    # boolean
-    value = builder._value_from_schema({"type": "boolean"})
-    assert value is True
-
-
-def test_value_from_schema_array():
+def test_value_from_schema_array(builder):
     """Test _value_from_schema handles array type."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     value = builder._value_from_schema({
         "type": "array",
         "items": {"type": "string"}
     })
-    assert isinstance(value, list)
+    assert type(value) is list
     assert len(value) == 1
     assert value[0] == "sample"
 
 
-def test_value_from_schema_object():
+def test_value_from_schema_object(builder):
     """Test _value_from_schema handles object type."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     value = builder._value_from_schema({
         "type": "object",
         "properties": {
@@ -395,97 +293,68 @@ def test_value_from_schema_object():
             "age": {"type": "integer"}
         }
     })
-    assert isinstance(value, dict)
+    assert type(value) is dict
     assert value["name"] == "sample"
     assert value["age"] == 1
 
 
-def test_value_from_schema_object_with_additional_properties():
+def test_value_from_schema_object_with_additional_properties(builder):
     """Test _value_from_schema handles additionalProperties."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     value = builder._value_from_schema({
         "type": "object",
         "additionalProperties": {"type": "string"}
     })
-    assert isinstance(value, dict)
+    assert type(value) is dict
     assert "key" in value
     assert value["key"] == "sample"
 
 
-def test_value_from_schema_anyof():
-    """Test _value_from_schema handles anyOf."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    value = builder._value_from_schema({
-        "anyOf": [
-            {"type": "string"},
-            {"type": "integer"}
-        ]
-    })
-    assert value == "sample"
-
-
-def test_value_from_schema_oneof():
-    """Test _value_from_schema handles oneOf."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
-    value = builder._value_from_schema({
-        "oneOf": [
-            {"type": "integer"},
-            {"type": "string"}
-        ]
-    })
-    assert value == 1
-
+_NESTED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "level1": {
+            "type": "object",
+            "properties": {"level2": {"type": "string", "format": "email"}},
+        }
+    },
+}
 
-def test_value_from_schema_depth_limit():
-    """Test _value_from_schema respects depth limit."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
 
-    # Create deeply nested schema
-    value = builder._value_from_schema({
-        "type": "object",
-        "properties": {
-            "level1": {
-                "type": "object",
-                "properties": {
-                    "level2": {
-                        "type": "object",
-                        "properties": {
-                            "level3": {"type": "string"}
-                        }
-                    }
-                }
-            }
-        }
-    }, depth=7)
-    # At depth 7, should still work but at depth > 8 returns "sample"
-    assert isinstance(value, dict)
+@pytest.mark.parametrize(
+    "depth, expected",
+    [
+        (0, {"level1": {"level2": "user@example.com"}}),
+        (5, {"level1": {"level2": "user@example.com"}}),
+        (7, {"level1": {"level2": "sample"}}),
+        (8, {"level1": "sample"}),
+        (9, "sample"),
+        (20, "sample"),
+    ],
+)
+def test_value_from_schema_depth_limit(builder, depth, expected):
+    """Nesting beyond depth 8 collapses to "sample", deterministically."""
+    assert builder._value_from_schema(_NESTED_SCHEMA, depth=depth) == expected
+    assert builder._value_from_schema(_NESTED_SCHEMA, depth=depth) == expected
 
 
-def test_value_from_schema_none():
+def test_value_from_schema_none(builder):
     """Test _value_from_schema handles None schema."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     value = builder._value_from_schema(None)
     assert value == "sample"
 
 
-def test_value_from_schema_empty_dict():
+def test_value_from_schema_empty_dict(builder):
     """Test _value_from_schema handles empty dict schema."""
-    schema = {}
-    builder = SamplePayloadBuilder(schema)
-
     value = builder._value_from_schema({})
     assert value == "sample"
 
 
+def test_builder_initialization(builder, sample_openapi_schema):
+    """The builder keeps references to the schema it was given."""
+    assert builder.openapi_schema is sample_openapi_schema
+    assert builder.components is sample_openapi_schema["components"]
+
+
 def test_builder_with_none_schema():
     """Test SamplePayloadBuilder handles None openapi_schema."""
     builder = SamplePayloadBuilder(None)